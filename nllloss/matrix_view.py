@@ -0,0 +1,69 @@
+import numpy as np
+from manim import Matrix
+
+
+def window(n, max_items):
+    # Indices of the items shown out of n: all of them, or the first and last
+    # few around a None marking the ellipsis, max_items entries in total
+    if n <= max_items:
+        return list(range(n))
+    k = (max_items - 1) // 2
+    return list(range(k)) + [None] + list(range(n - k, n))
+
+
+class WindowedMatrix(Matrix):
+    # Matrix of a large array that only builds mobjects for the first and last
+    # rows and columns, with \vdots, \cdots and \ddots in between. row_index and
+    # col_index map the displayed rows and columns back to the array, so the
+    # cost of a scene no longer depends on the size of the data
+    def __init__(self, matrix, max_rows=5, max_cols=5, decimals=2, **kwargs):
+        matrix = np.asarray(matrix)
+        if matrix.ndim == 1:
+            matrix = matrix[:, None]
+        self.full_shape = matrix.shape
+        self.row_index = window(matrix.shape[0], max_rows)
+        self.col_index = window(matrix.shape[1], max_cols)
+
+        block = matrix[np.ix_(self.shown_rows, self.shown_cols)]
+        if decimals is not None and np.issubdtype(block.dtype, np.floating):
+            block = block.round(decimals)
+
+        entries = []
+        values = iter(block)
+        for r in self.row_index:
+            if r is None:
+                entries.append([r"\ddots" if c is None else r"\vdots" for c in self.col_index])
+            else:
+                row = iter(next(values))
+                entries.append([r"\cdots" if c is None else next(row) for c in self.col_index])
+        super().__init__(entries, **kwargs)
+
+        self._row_pos = {r: i for i, r in enumerate(self.row_index) if r is not None}
+        self._col_pos = {c: j for j, c in enumerate(self.col_index) if c is not None}
+
+    @property
+    def shown_rows(self):
+        return [r for r in self.row_index if r is not None]
+
+    @property
+    def shown_cols(self):
+        return [c for c in self.col_index if c is not None]
+
+    @property
+    def truncated(self):
+        return None in self.row_index
+
+    def get_entry(self, row, col=0):
+        # Entry of array cell (row, col), which must be displayed
+        return self.get_rows()[self._row_pos[row]][self._col_pos[col]]
+
+    def get_row(self, row):
+        return self.get_rows()[self._row_pos[row]]
+
+    def get_entry_or_ellipsis(self, row, col=0):
+        # get_entry, or the \cdots entry of the row when column col is hidden
+        j = self._col_pos[col] if col in self._col_pos else self.col_index.index(None)
+        return self.get_row(row)[j]
+
+    def get_ellipsis_row(self):
+        return self.get_rows()[self.row_index.index(None)]
@@ -0,0 +1,118 @@
+import numpy as np
+
+# Rows per chunk, bounds the temporaries to chunk_size x num_classes
+CHUNK_SIZE = 65536
+
+
+def _float(x, dtype=None):
+    x = np.asarray(x)
+    if dtype is None:
+        dtype = x.dtype if np.issubdtype(x.dtype, np.floating) else np.float64
+    return x.astype(dtype, copy=False)
+
+
+def _chunks(n, chunk_size):
+    for start in range(0, n, chunk_size):
+        yield slice(start, min(start + chunk_size, n))
+
+
+def logsumexp(z, chunk_size=CHUNK_SIZE, dtype=None):
+    z = _float(z, dtype)
+    out = np.empty(z.shape[0], dtype=z.dtype)
+    for rows in _chunks(z.shape[0], chunk_size):
+        zc = z[rows]
+        m = zc.max(1)
+        out[rows] = m + np.log(np.exp(zc - m[:, None]).sum(1))
+    return out
+
+
+def log_softmax(z, chunk_size=CHUNK_SIZE, dtype=None, out=None):
+    z = _float(z, dtype)
+    out = np.empty_like(z) if out is None else out
+    for rows in _chunks(z.shape[0], chunk_size):
+        out[rows] = z[rows] - logsumexp(z[rows], chunk_size=chunk_size)[:, None]
+    return out
+
+
+def softmax(z, chunk_size=CHUNK_SIZE, dtype=None):
+    return np.exp(log_softmax(z, chunk_size=chunk_size, dtype=dtype))
+
+
+def log_sigmoid(z):
+    # log(1 / (1 + exp(-z))) without overflow for large |z|
+    z = _float(z)
+    return -np.logaddexp(0, -z)
+
+
+def logit(p):
+    p = _float(p)
+    return np.log(p) - np.log1p(-p)
+
+
+def _reduce(losses, reduction, total, weight_sum):
+    if reduction == "none":
+        return losses
+    if reduction == "sum":
+        return total
+    if reduction == "mean":
+        return total / weight_sum
+    raise ValueError(f"Unknown reduction {reduction!r}, expected 'none', 'sum' or 'mean'")
+
+
+def nll_loss(z, labels, weights=None, reduction="mean", chunk_size=CHUNK_SIZE, dtype=None):
+    # Negative log likelihood of the labels under softmax(z), computed from the
+    # logits as logsumexp(z_i) - z_i[y_i] one chunk of rows at a time. With
+    # class weights w the mean is sum(w[y_i] l_i) / sum(w[y_i])
+    z = _float(z, dtype)
+    labels = np.asarray(labels).reshape(-1)
+    weights = None if weights is None else np.asarray(weights, dtype=np.float64)
+
+    losses = np.empty(z.shape[0], dtype=z.dtype) if reduction == "none" else None
+    total = weight_sum = 0.0
+    for rows in _chunks(z.shape[0], chunk_size):
+        zc, yc = z[rows], labels[rows]
+        loss = logsumexp(zc, chunk_size=chunk_size) - zc[np.arange(yc.size), yc]
+        if weights is not None:
+            w = weights[yc]
+            loss = loss * w
+            weight_sum += w.sum()
+        else:
+            weight_sum += yc.size
+        # Accumulate in float64 even for float32 inputs
+        total += loss.sum(dtype=np.float64)
+        if losses is not None:
+            losses[rows] = loss
+
+    return _reduce(losses, reduction, total, weight_sum)
+
+
+def binary_cross_entropy_with_logits(
+    z,
+    labels,
+    weights=None,
+    reduction="mean",
+    chunk_size=CHUNK_SIZE,
+    dtype=None,
+):
+    # -(y log sigmoid(z) + (1 - y) log sigmoid(-z)), labels may be soft;
+    # weights holds the (negative, positive) class weights
+    z = _float(z, dtype).reshape(-1)
+    labels = np.asarray(labels).reshape(-1)
+    weights = None if weights is None else np.asarray(weights, dtype=np.float64)
+
+    losses = np.empty(z.shape[0], dtype=z.dtype) if reduction == "none" else None
+    total = weight_sum = 0.0
+    for rows in _chunks(z.shape[0], chunk_size):
+        zc, yc = z[rows], labels[rows]
+        loss = -(yc * log_sigmoid(zc) + (1 - yc) * log_sigmoid(-zc))
+        if weights is not None:
+            w = yc * weights[1] + (1 - yc) * weights[0]
+            loss = loss * w
+            weight_sum += w.sum()
+        else:
+            weight_sum += yc.size
+        total += loss.sum(dtype=np.float64)
+        if losses is not None:
+            losses[rows] = loss
+
+    return _reduce(losses, reduction, total, weight_sum)
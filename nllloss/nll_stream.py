@@ -0,0 +1,71 @@
+import numpy as np
+
+from nll import CHUNK_SIZE, binary_cross_entropy_with_logits, nll_loss
+
+
+def open_array(path, dtype=np.float32, num_columns=None):
+    # Memory map a .npy file, or a headerless little endian file of dtype
+    # holding num_columns values per row (one value per row if None)
+    if str(path).endswith(".npy"):
+        return np.load(path, mmap_mode="r")
+    array = np.memmap(path, dtype=np.dtype(dtype).newbyteorder("<"), mode="r")
+    return array if num_columns is None else array.reshape(-1, num_columns)
+
+
+class NLLSummary:
+    # Running totals of a streaming NLL pass: total and mean loss, loss per
+    # true class and the k rows with the largest loss
+    def __init__(self, num_classes, k=5):
+        self.num_classes = num_classes
+        self.k = k
+        self.num_rows = 0
+        self.total = 0.0
+        self.class_count = np.zeros(num_classes, dtype=np.int64)
+        self.class_total = np.zeros(num_classes)
+        self.hardest = np.empty(0, dtype=np.int64)
+        self.hardest_loss = np.empty(0)
+
+    @property
+    def mean(self):
+        return self.total / self.num_rows if self.num_rows else float("nan")
+
+    @property
+    def class_mean(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.class_total / self.class_count
+
+    def update(self, losses, labels):
+        losses = np.asarray(losses, dtype=np.float64)
+        labels = np.asarray(labels).reshape(-1)
+        self.total += losses.sum()
+        self.class_count += np.bincount(labels, minlength=self.num_classes)
+        self.class_total += np.bincount(labels, losses, minlength=self.num_classes)
+
+        # Top k of the previous top k and this chunk, sorted by decreasing loss
+        rows = np.concatenate((self.hardest, self.num_rows + np.arange(losses.size)))
+        loss = np.concatenate((self.hardest_loss, losses))
+        if loss.size > self.k:
+            top = np.argpartition(-loss, self.k - 1)[:self.k]
+            rows, loss = rows[top], loss[top]
+        order = np.lexsort((rows, -loss))
+        self.hardest, self.hardest_loss = rows[order], loss[order]
+        self.num_rows += losses.size
+        return self
+
+
+def summarize(predictions, labels, k=5, chunk_size=CHUNK_SIZE):
+    # One pass over (possibly memory mapped) logits and labels, a chunk of rows
+    # at a time. 1-D or single column predictions are binary logits, scored
+    # with the binary cross entropy, anything else with the softmax NLL
+    binary = predictions.ndim == 1 or predictions.shape[1] == 1
+    summary = NLLSummary(2 if binary else predictions.shape[1], k)
+    labels = labels.reshape(-1)
+    for start in range(0, len(predictions), chunk_size):
+        z = np.asarray(predictions[start:start + chunk_size])
+        y = np.asarray(labels[start:start + chunk_size]).astype(np.int64)
+        if binary:
+            losses = binary_cross_entropy_with_logits(z, y, reduction="none")
+        else:
+            losses = nll_loss(z, y, reduction="none")
+        summary.update(losses, y)
+    return summary
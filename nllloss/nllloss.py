@@ -1,35 +1,111 @@
+import sys
+from pathlib import Path
+
 from manim import *
 import numpy as np
 
-class BinaryCase(Scene):
+# Shared helpers (vizutils) live at the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from vizutils.profiling import ProfiledScene
+from vizutils.tex_cache import cached_math_tex
+from vizutils.tex_prewarm import PrewarmedScene
+
+from matrix_view import WindowedMatrix, window
+from nll import binary_cross_entropy_with_logits, log_sigmoid, log_softmax, logit, nll_loss
+from nll_stream import open_array, summarize
+
+# Optional model output to show instead of the random examples: logits (N for
+# BinaryCase, N x C for MultiCase) and integer labels, as .npy files or raw
+# little endian float32 logits and int64 labels. They are memory mapped and
+# streamed, the scenes show the hardest rows and the loss over all of them
+BINARY_PREDICTIONS = None
+BINARY_LABELS = None
+MULTI_PREDICTIONS = None
+MULTI_LABELS = None
+MULTI_NUM_CLASSES = 3
+
+
+def load_predictions(predictions, labels, num_rows, num_columns=None):
+    z = open_array(predictions, num_columns=num_columns)
+    y_true = open_array(labels, dtype=np.int64)
+    summary = summarize(z, y_true, k=num_rows)
+    # Only the hardest rows are read from the mapped files
+    rows = summary.hardest
+    return np.asarray(z[rows], dtype=np.float64), np.asarray(y_true[rows]).reshape(-1), summary
+
+
+def aggregate_text(mat, total, summary=None):
+    # The total alone when every row is on screen, otherwise labelled sum and
+    # mean rows since the visible entries no longer add up to it, followed by
+    # the mean per true class for streamed predictions
+    if summary is None and not mat.truncated:
+        return cached_math_tex(round(total, 2))
+    if summary is not None:
+        total, num_rows = -summary.total, summary.num_rows
+    else:
+        num_rows = mat.full_shape[0]
+    lines = [
+        cached_math_tex(rf"\text{{sum}} = {round(total, 2)}"),
+        cached_math_tex(rf"\text{{mean}} = {round(total / num_rows, 2)}"),
+    ]
+    if summary is not None:
+        for c in window(summary.num_classes, 5):
+            if c is None:
+                lines.append(cached_math_tex(r"\vdots"))
+            else:
+                lines.append(cached_math_tex(rf"\text{{mean}}_{{y={c}}} = {round(-summary.class_mean[c], 2)}"))
+    return VGroup(*lines).arrange(DOWN, aligned_edge=LEFT).scale(0.8)
+
+
+class BinaryCase(PrewarmedScene, ProfiledScene, Scene):
+    # Only the first and last rows are drawn once num_rows exceeds 5
+    num_rows = 5
+
     @staticmethod
     def matrix(*args, **kwargs):
-        return Matrix(*args, h_buff=1.8, v_buff=1).scale(0.8)
+        return WindowedMatrix(*args, h_buff=1.8, v_buff=1, element_to_mobject=cached_math_tex).scale(0.8)
 
-    def construct(self):
+    def data(self):
+        # Logits, not probabilities: sigmoid(z) rounds to 0 or 1 for |z| > ~37
+        if BINARY_PREDICTIONS is not None:
+            z, y_true, self.summary = load_predictions(BINARY_PREDICTIONS, BINARY_LABELS, self.num_rows)
+            return z.reshape(-1, 1), np.expand_dims(y_true, 1)
+
+        self.summary = None
         rng = np.random.default_rng(0)
-        y = np.expand_dims(rng.random(5), 1)
-        y_true = np.expand_dims(np.array([1, 0, 0, 1, 0], dtype=int), 1)
+        z = logit(np.expand_dims(rng.random(self.num_rows), 1))
+        if self.num_rows == 5:
+            y_true = np.array([1, 0, 0, 1, 0], dtype=int)
+        else:
+            y_true = rng.integers(0, 2, self.num_rows)
+        return z, np.expand_dims(y_true, 1)
+
+    def construct(self):
+        z, y_true = self.data()
+        # Probabilities and their logs from the logits, stable for any z
+        log_y, log_1my = log_sigmoid(z), log_sigmoid(-z)
+        y, one_minus_y = np.exp(log_y), np.exp(log_1my)
+        ll = -binary_cross_entropy_with_logits(z, y_true, reduction="none")
 
-        m = self.matrix(y.round(2)).shift(RIGHT * 3)
-        y_text = MathTex(r"\hat{y} =").next_to(m, direction=LEFT)
+        m = self.matrix(y).shift(RIGHT * 3)
+        y_text = cached_math_tex(r"\hat{y} =").next_to(m, direction=LEFT)
 
         g1 = Group(m, y_text)
         self.play(FadeIn(g1))
         self.wait(2)
 
-        m2 = self.matrix((1 - y).round(2)).shift(LEFT * 2)
-        y2_text = MathTex(r"(1 - \hat{y}) =").next_to(m2, direction=LEFT)
+        m2 = self.matrix(one_minus_y).shift(LEFT * 2)
+        y2_text = cached_math_tex(r"(1 - \hat{y}) =").next_to(m2, direction=LEFT)
 
         g2 = Group(m2, y2_text)
         self.play(FadeIn(g2))
         self.wait(3)
 
-        logm = self.matrix(np.log(y).round(2)).shift(RIGHT * 3)
-        logy_text = MathTex(r"\log{\hat{y}} =").next_to(logm, direction=LEFT)
+        logm = self.matrix(log_y).shift(RIGHT * 3)
+        logy_text = cached_math_tex(r"\log{\hat{y}} =").next_to(logm, direction=LEFT)
 
-        logm2 = self.matrix(np.log(1 - y).round(2)).shift(LEFT * 2)
-        logy2_text = MathTex(r"\log{(1 - \hat{y})} =").next_to(logm2, direction=LEFT)
+        logm2 = self.matrix(log_1my).shift(LEFT * 2)
+        logy2_text = cached_math_tex(r"\log{(1 - \hat{y})} =").next_to(logm2, direction=LEFT)
 
         log_g1 = Group(logm, logy_text)
         log_g2 = Group(logm2, logy2_text)
@@ -41,14 +117,14 @@ class BinaryCase(Scene):
         mat = self.matrix(
             np.hstack(
                 (
-                    np.log(1 - y).round(2),
-                    np.log(y).round(2),
+                    log_1my,
+                    log_y,
                 ),
             ),
         ).shift(LEFT)
-        mat_annot1 = MathTex(r"\log(1 - \hat{y})").next_to(mat.get_columns()[0], direction=UP).scale(0.6).shift(0.1 * LEFT + 0.1 * UP)
-        mat_annot2 = MathTex(r"\log(\hat{y})").next_to(mat.get_columns()[1], direction=UP).scale(0.6).shift(0.1 * RIGHT + 0.1 * UP)
-        nlll_eqn = MathTex(r"y \log{\hat{y}} + (1 - y) \log{(1 - \hat{y})}")\
+        mat_annot1 = cached_math_tex(r"\log(1 - \hat{y})").next_to(mat.get_columns()[0], direction=UP).scale(0.6).shift(0.1 * LEFT + 0.1 * UP)
+        mat_annot2 = cached_math_tex(r"\log(\hat{y})").next_to(mat.get_columns()[1], direction=UP).scale(0.6).shift(0.1 * RIGHT + 0.1 * UP)
+        nlll_eqn = cached_math_tex(r"y \log{\hat{y}} + (1 - y) \log{(1 - \hat{y})}")\
             .next_to(mat.get_columns()[1], direction=UP).scale(0.6).shift(3.1 * RIGHT + 0.1 * UP)
         mat_brace = Brace(mat, direction=DOWN)
         mat_brace_text = Text("Log predicted probabilities", font_size=24).next_to(mat_brace, direction=DOWN)
@@ -63,8 +139,8 @@ class BinaryCase(Scene):
         )
         self.wait(3)
 
-        m_true = self.matrix(y_true.round(0)).shift(LEFT * 4)
-        y_true_text = MathTex(r"y =").next_to(m_true, direction=LEFT)
+        m_true = self.matrix(y_true).shift(LEFT * 4)
+        y_true_text = cached_math_tex(r"y =").next_to(m_true, direction=LEFT)
         g_true = Group(m_true, y_true_text)
         m_true_brace = Brace(m_true, direction=DOWN)
         m_true_brace_text = Text("True labels", font_size=24).next_to(m_true_brace, direction=DOWN)
@@ -75,10 +151,9 @@ class BinaryCase(Scene):
         arrows = []
         r_boxes = []
         nllls = []
-        nlll_sum = 0
-        for i in range(5):
-            l_entry = m_true.get_entries()[i]
-            r_entry = mat.get_columns()[y_true[i, 0]][i]
+        for i in m_true.shown_rows:
+            l_entry = m_true.get_entry(i)
+            r_entry = mat.get_entry(i, y_true[i, 0])
             arrows.append(
                 Arrow(
                     start=l_entry.get_center(),
@@ -86,14 +161,13 @@ class BinaryCase(Scene):
                 )
             )
             r_boxes.append(SurroundingRectangle(r_entry))
-            nlll = np.log(y[i, 0]).round(2) if y_true[i, 0] == 1 else np.log(1 - y[i, 0]).round(2)
+            nlll = ll[i].round(2)
             nllls.append(
-                MathTex(nlll).next_to(
-                    mat.get_columns()[1][i],
+                cached_math_tex(nlll).next_to(
+                    mat.get_entry(i, 1),
                     direction=RIGHT,
                 ).shift(RIGHT * 1.4).scale(0.8)
             )
-            nlll_sum += nlll
 
         for i in range(len(arrows)):
             if i == 0:
@@ -109,69 +183,92 @@ class BinaryCase(Scene):
                     Write(nllls[i]),
                 )
         self.play(FadeOut(arrows[i]))
+        if mat.truncated:
+            dots = cached_math_tex(r"\vdots").next_to(mat.get_ellipsis_row()[1], direction=RIGHT).shift(RIGHT * 1.4).scale(0.8)
+            self.play(Write(dots))
 
         # Summing up the log likelihoods
         brace = Brace(mat, direction=RIGHT).shift(RIGHT * 3)
-        nlll_text = MathTex(round(nlll_sum, 2)).next_to(brace, direction=RIGHT)
+        nlll_sum = -binary_cross_entropy_with_logits(z, y_true, reduction="sum")
+        nlll_text = aggregate_text(mat, nlll_sum, self.summary).next_to(brace, direction=RIGHT)
         self.play(Write(brace), Write(nlll_text))
 
         self.wait(5)
 
 
-class MultiCase(Scene):
+class MultiCase(PrewarmedScene, ProfiledScene, Scene):
+    # Only the first and last rows are drawn once num_rows exceeds 5
+    num_rows = 5
+
     @staticmethod
     def matrix(*args, **kwargs):
-        return Matrix(*args, h_buff=1.8, v_buff=1).scale(0.8)
+        return WindowedMatrix(*args, h_buff=1.8, v_buff=1, element_to_mobject=cached_math_tex).scale(0.8)
 
-    def construct(self):
+    def data(self):
+        if MULTI_PREDICTIONS is not None:
+            z, y_true, self.summary = load_predictions(
+                MULTI_PREDICTIONS, MULTI_LABELS, self.num_rows, num_columns=MULTI_NUM_CLASSES,
+            )
+            return z, np.expand_dims(y_true, 1)
+
+        self.summary = None
         rng = np.random.default_rng(0)
-        z = rng.normal(0, 1, (5, 3))
-        y = (np.exp(z).T / np.exp(z).sum(1)).T
-        y_true = np.expand_dims(np.array([0, 2, 2, 0, 1], dtype=int), 1)
+        z = rng.normal(0, 1, (self.num_rows, MULTI_NUM_CLASSES))
+        if (self.num_rows, MULTI_NUM_CLASSES) == (5, 3):
+            y_true = np.array([0, 2, 2, 0, 1], dtype=int)
+        else:
+            y_true = rng.integers(0, MULTI_NUM_CLASSES, self.num_rows)
+        return z, np.expand_dims(y_true, 1)
+
+    def construct(self):
+        z, y_true = self.data()
+        log_y = log_softmax(z)
+        y = np.exp(log_y)
 
         # Raw prediction socres (z)
-        m = self.matrix(z.round(2))
-        z_text = MathTex(r"z =").next_to(m, direction=LEFT)
+        m = self.matrix(z)
+        z_text = cached_math_tex(r"z =").next_to(m, direction=LEFT)
         self.play(FadeIn(m), FadeIn(z_text))
         self.wait(3)
 
         # Softmax transform (y_hat)
-        m2 = self.matrix(y.round(2))
-        y_text = MathTex(r"\hat{y} = \text{softmax}(z) = ").next_to(m2, direction=LEFT)
+        m2 = self.matrix(y)
+        y_text = cached_math_tex(r"\hat{y} = \text{softmax}(z) = ").next_to(m2, direction=LEFT)
         self.play(ReplacementTransform(m, m2), ReplacementTransform(z_text, y_text))
         self.wait(3)
 
-        y_text_brief = MathTex(r"\hat{y}=").next_to(m2, direction=LEFT)
+        y_text_brief = cached_math_tex(r"\hat{y}=").next_to(m2, direction=LEFT)
         self.play(ReplacementTransform(y_text, y_text_brief))
         self.wait(1)
 
         # Log y_hat
-        logm = self.matrix(np.log(y).round(2))
-        logy_text = MathTex(r"\log{\hat{y}} =").next_to(logm, direction=LEFT)
+        logm = self.matrix(log_y)
+        logy_text = cached_math_tex(r"\log{\hat{y}} =").next_to(logm, direction=LEFT)
         self.play(
             ReplacementTransform(m2, logm),
             ReplacementTransform(y_text_brief, logy_text),
         )
         self.wait(3)
 
-        mat_annot1 = MathTex(r"\log\hat{y}^{(0)}").next_to(logm.get_columns()[0], direction=UP).scale(0.6).shift(0.2 * RIGHT + 0.1 * UP)
-        mat_annot2 = MathTex(r"\log\hat{y}^{(1)}").next_to(logm.get_columns()[1], direction=UP).scale(0.6).shift(0.2 * RIGHT + 0.1 * UP)
-        mat_annot3 = MathTex(r"\log\hat{y}^{(2)}").next_to(logm.get_columns()[2], direction=UP).scale(0.6).shift(0.2 * RIGHT + 0.1 * UP)
-        nlll_eqn = MathTex(r"\log{\hat{y}^{(y_i)}}").next_to(logm.get_columns()[2], direction=UP).scale(0.6).shift(2.1 * RIGHT + 0.1 * UP)
+        # One header per shown class column, the loss column after the last one
+        mat_annots = [
+            cached_math_tex(rf"\log\hat{{y}}^{{({c})}}").next_to(column, direction=UP).scale(0.6).shift(0.2 * RIGHT + 0.1 * UP)
+            for c, column in zip(logm.col_index, logm.get_columns())
+            if c is not None
+        ]
+        nlll_eqn = cached_math_tex(r"\log{\hat{y}^{(y_i)}}").next_to(logm.get_columns()[-1], direction=UP).scale(0.6).shift(2.1 * RIGHT + 0.1 * UP)
         mat_brace = Brace(logm, direction=DOWN)
         mat_brace_text = Text("Log predicted probabilities", font_size=24).next_to(mat_brace, direction=DOWN)
 
         self.play(
-            Create(mat_annot1),
-            Create(mat_annot2),
-            Create(mat_annot3),
+            *[Create(annot) for annot in mat_annots],
             Create(nlll_eqn),
             FadeIn(mat_brace),
             FadeIn(mat_brace_text),
         )
 
-        m_true = self.matrix(y_true.round(0)).shift(LEFT * 5)
-        y_true_text = MathTex(r"y =").next_to(m_true, direction=LEFT)
+        m_true = self.matrix(y_true).shift(LEFT * 5)
+        y_true_text = cached_math_tex(r"y =").next_to(m_true, direction=LEFT)
         g_true = Group(m_true, y_true_text)
         m_true_brace = Brace(m_true, direction=DOWN)
         m_true_brace_text = Text("True labels", font_size=24).next_to(m_true_brace, direction=DOWN)
@@ -182,10 +279,11 @@ class MultiCase(Scene):
         arrows = []
         r_boxes = []
         nllls = []
-        nlll_sum = 0
-        for i in range(5):
-            l_entry = m_true.get_entries()[i]
-            r_entry = logm.get_columns()[y_true[i, 0]][i]
+        ll = -nll_loss(z, y_true[:, 0], reduction="none")
+        for i in m_true.shown_rows:
+            l_entry = m_true.get_entry(i)
+            # Labels in hidden columns point at the row's \cdots
+            r_entry = logm.get_entry_or_ellipsis(i, y_true[i, 0])
             arrows.append(
                 Arrow(
                     start=l_entry.get_center(),
@@ -193,14 +291,13 @@ class MultiCase(Scene):
                 )
             )
             r_boxes.append(SurroundingRectangle(r_entry))
-            nlll = np.log(y[i, y_true[i,0]]).round(2)
+            nlll = ll[i].round(2)
             nllls.append(
-                MathTex(nlll).next_to(
-                    logm.get_columns()[2][i],
+                cached_math_tex(nlll).next_to(
+                    logm.get_row(i)[-1],
                     direction=RIGHT,
                 ).shift(RIGHT * 0.7).scale(0.8)
             )
-            nlll_sum += nlll
 
         for i in range(len(arrows)):
             if i == 0:
@@ -216,10 +313,14 @@ class MultiCase(Scene):
                     Write(nllls[i]),
                 )
         self.play(FadeOut(arrows[i]))
+        if logm.truncated:
+            dots = cached_math_tex(r"\vdots").next_to(logm.get_ellipsis_row()[-1], direction=RIGHT).shift(RIGHT * 0.7).scale(0.8)
+            self.play(Write(dots))
 
         # Summing up the log likelihoods
         brace = Brace(logm, direction=RIGHT).shift(RIGHT * 2)
-        nlll_text = MathTex(round(nlll_sum, 2)).next_to(brace, direction=RIGHT)
+        nlll_sum = -nll_loss(z, y_true[:, 0], reduction="sum")
+        nlll_text = aggregate_text(logm, nlll_sum, self.summary).next_to(brace, direction=RIGHT)
         self.play(Write(brace), Write(nlll_text))
 
         self.wait(5)
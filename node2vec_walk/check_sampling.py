@@ -0,0 +1,85 @@
+import sys
+
+import numpy as np
+
+from sampling import ALIAS_SCALE, alias_tables
+
+# Every weighted and node2vec walk draws from alias_tables, run this after
+# touching it: python node2vec_walk/check_sampling.py
+TOLERANCE = 1e-9
+
+
+def implied(prob, alias, indptr):
+    # Chance of drawing each item: its own cell keeps prob of the 1 / degree
+    # it is drawn with, the rest goes to the item it aliases to
+    degree = np.diff(indptr)
+    seg = np.repeat(np.arange(degree.size), degree)
+    share = 1 / degree[seg]
+    out = prob * share
+    np.add.at(out, indptr[seg] + alias, (1 - prob) * share)
+    return out
+
+
+def expected(weights, indptr):
+    # w / sum(w) per segment, uniform for segments of total weight 0
+    degree = np.diff(indptr)
+    seg = np.repeat(np.arange(degree.size), degree)
+    total = np.bincount(seg, weights, minlength=degree.size)[seg]
+    return np.where(total > 0, weights / np.where(total > 0, total, 1), 1 / degree[seg])
+
+
+def random_case(rng):
+    # A few segments, some empty, with zero weights, all-zero segments, ties
+    # and integer weights that make items land exactly on the sweep boundaries
+    degree = rng.integers(0, 9, rng.integers(1, 8))
+    indptr = np.r_[0, np.cumsum(degree)]
+    kind = rng.integers(3)
+    if kind == 0:
+        weights = rng.random(indptr[-1]) * (rng.random(indptr[-1]) < 0.8)
+    elif kind == 1:
+        weights = rng.integers(0, 4, indptr[-1]).astype(np.float64)
+    else:
+        weights = rng.random(indptr[-1]) ** 8 * 1e6
+    weights[np.repeat(rng.random(degree.size) < 0.1, degree)] = 0
+    return weights, indptr
+
+
+def check(weights, indptr):
+    prob, alias = alias_tables(weights, indptr)
+    degree = np.diff(indptr)
+    local_size = np.repeat(degree, degree)
+    errors = []
+    if prob.shape != weights.shape or alias.shape != weights.shape:
+        errors.append("table shapes differ from the weights")
+    elif ((prob < 0) | (prob > 1)).any():
+        errors.append("prob outside [0, 1]")
+    elif ((alias < 0) | (alias >= local_size)).any():
+        errors.append("alias points outside its segment")
+    else:
+        err = np.abs(implied(prob, alias, indptr) - expected(weights, indptr)).max(initial=0)
+        if err > TOLERANCE:
+            errors.append(f"implied distribution off by {err:.2e}")
+    return errors
+
+
+def main(num_cases=300, seed=0):
+    rng = np.random.default_rng(seed)
+    cases = [random_case(rng) for _ in range(num_cases)]
+    # All cases again as one set of segments, so that the running sums carry
+    # over many segment boundaries
+    weights = np.concatenate([w for w, _ in cases])
+    degree = np.concatenate([np.diff(indptr) for _, indptr in cases])
+    cases.append((weights, np.r_[0, np.cumsum(degree)]))
+    cases.append((np.zeros(0), np.zeros(1, dtype=np.int64)))
+
+    failed = 0
+    for i, (weights, indptr) in enumerate(cases):
+        for error in check(weights, indptr):
+            failed += 1
+            print(f"case {i}: {error}", file=sys.stderr)
+    print(f"{len(cases)} cases, {failed} failures (fixed point scale 2^{ALIAS_SCALE.bit_length() - 1})")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
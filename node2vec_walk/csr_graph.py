@@ -0,0 +1,124 @@
+import os
+
+import numpy as np
+
+
+class CSRGraph:
+    def __init__(self, indptr, indices, data=None, nodes=None):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.data = None if data is None else np.asarray(data, dtype=np.float64)
+        self.nodes = np.arange(self.num_nodes) if nodes is None else np.asarray(nodes)
+        self._edge_keys = None
+
+    @property
+    def num_nodes(self):
+        return self.indptr.size - 1
+
+    @property
+    def num_edges(self):
+        return self.indices.size
+
+    @property
+    def weighted(self):
+        return self.data is not None
+
+    @property
+    def degree(self):
+        return np.diff(self.indptr)
+
+    def neighbors(self, idx):
+        return self.indices[self.indptr[idx]:self.indptr[idx + 1]]
+
+    def index(self, nodes):
+        # Positions of the given node labels in self.nodes, KeyError for
+        # labels that are not in the graph
+        sorter = np.argsort(self.nodes, kind="stable")
+        nodes = np.asarray(nodes)
+        flat = nodes.reshape(-1)
+        idx = np.searchsorted(self.nodes, flat, sorter=sorter)
+        found = idx < self.num_nodes
+        idx[found] = sorter[idx[found]]
+        found[found] = self.nodes[idx[found]] == flat[found]
+        if not found.all():
+            raise KeyError(f"nodes not in the graph: {flat[~found][:10].tolist()}")
+        return idx.reshape(nodes.shape)
+
+    def has_edge(self, src, dst):
+        # Vectorized lookup of (src, dst) pairs in the sorted edge keys
+        if self._edge_keys is None:
+            rows = np.repeat(np.arange(self.num_nodes, dtype=np.int64), self.degree)
+            self._edge_keys = np.sort(rows * self.num_nodes + self.indices)
+
+        keys = np.asarray(src, dtype=np.int64) * self.num_nodes + dst
+        pos = np.searchsorted(self._edge_keys, keys).clip(max=max(self.num_edges - 1, 0))
+        return self._edge_keys[pos] == keys if self.num_edges else np.zeros(keys.shape, bool)
+
+    @classmethod
+    def from_edges(cls, src, dst, weights=None, nodes=None, directed=False):
+        # Edges as node indices; neighbors are listed in edge order, which is
+        # the adjacency order networkx gives a graph built with add_edges_from
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int64)
+        num_nodes = len(nodes) if nodes is not None else int(max(src.max(initial=-1), dst.max(initial=-1))) + 1
+        if weights is not None:
+            weights = np.asarray(weights, dtype=np.float64)
+        if not directed:
+            # Both directions of edge i next to each other, self loops once
+            keep = np.column_stack((np.ones(src.size, bool), src != dst)).ravel()
+            src, dst = np.column_stack((src, dst)).ravel()[keep], np.column_stack((dst, src)).ravel()[keep]
+            weights = None if weights is None else np.repeat(weights, 2)[keep]
+
+        order = np.argsort(src, kind="stable")
+        indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=num_nodes), out=indptr[1:])
+        return cls(indptr, dst[order], data=None if weights is None else weights[order], nodes=nodes)
+
+    @classmethod
+    def from_networkx(cls, nxg, weight=None):
+        # Keep the networkx adjacency order so that the k-th neighbor of a node
+        # is the same as list(nxg[node])[k]; weight names the edge attribute to
+        # read (missing ones default to 1), None gives an unweighted graph
+        nodes = list(nxg)
+        node_idx = {node: i for i, node in enumerate(nodes)}
+
+        indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+        indices = []
+        data = None if weight is None else []
+        for i, node in enumerate(nodes):
+            nbrs = nxg[node]
+            indices.extend(node_idx[nbr] for nbr in nbrs)
+            if weight is not None:
+                data.extend(attr.get(weight, 1) for attr in nbrs.values())
+            indptr[i + 1] = indptr[i] + len(nbrs)
+
+        return cls(indptr, indices, data=data, nodes=nodes)
+
+    def to_networkx(self):
+        import networkx as nx
+
+        nxg = nx.Graph()
+        nxg.add_nodes_from(self.nodes.tolist())
+        src = self.nodes[np.repeat(np.arange(self.num_nodes), self.degree)].tolist()
+        dst = self.nodes[self.indices].tolist()
+        if self.weighted:
+            nxg.add_weighted_edges_from(zip(src, dst, self.data.tolist()))
+        else:
+            nxg.add_edges_from(zip(src, dst))
+        return nxg
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        for name in ("indptr", "indices", "data", "nodes"):
+            arr = getattr(self, name)
+            if arr is not None:
+                np.save(os.path.join(path, f"{name}.npy"), arr)
+
+    @classmethod
+    def load(cls, path, mmap_mode="r"):
+        arrays = {}
+        for name in ("indptr", "indices", "data", "nodes"):
+            file = os.path.join(path, f"{name}.npy")
+            if os.path.exists(file):
+                arrays[name] = np.load(file, mmap_mode=mmap_mode)
+        return cls(**arrays)
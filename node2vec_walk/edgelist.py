@@ -0,0 +1,83 @@
+import json
+import os
+import shutil
+import warnings
+
+import numpy as np
+
+from csr_graph import CSRGraph
+
+# Bumped when read_edg lays out the CSR arrays differently, so that older
+# <path>.csr caches are rebuilt
+CACHE_VERSION = 2
+
+
+def _parse(path, num_cols):
+    # Numeric edge lists go through numpy's C text parser in one call, other
+    # node ids fall back to the (slower) generic text reader
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        try:
+            values = np.fromfile(path, sep=" ")
+        except (ValueError, DeprecationWarning):
+            values = None
+
+    if values is None or values.size % num_cols:
+        table = np.loadtxt(path, dtype=str, ndmin=2)
+        return table[:, :2], table[:, 2].astype(np.float64) if num_cols > 2 else None
+
+    table = values.reshape(-1, num_cols)
+    ends = table[:, :2]
+    if np.array_equal(ends, ends.round()):
+        ends = ends.astype(np.int64)
+    return ends, table[:, 2] if num_cols > 2 else None
+
+
+def read_edg(path, weighted=False, directed=False):
+    # Whitespace separated "u v [w]" lines, as read by PecanPy
+    with open(path) as f:
+        first = f.readline().split()
+    if not first:
+        return CSRGraph(np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int32))
+
+    ends, weights = _parse(path, len(first))
+    nodes, idx = np.unique(ends, return_inverse=True)
+    src, dst = idx.reshape(-1, 2).T
+    if not weighted:
+        weights = None
+    elif weights is None:
+        raise ValueError(f"{path} has no weight column")
+
+    return CSRGraph.from_edges(src, dst, weights=weights, nodes=nodes, directed=directed)
+
+
+def load_edg(path, weighted=False, directed=False, cache=True):
+    # Parse the edge list once and keep the CSR arrays in <path>.csr, later
+    # loads memory map them as long as the source file did not change
+    if not cache:
+        return read_edg(path, weighted=weighted, directed=directed)
+
+    stat = os.stat(path)
+    meta = {
+        "version": CACHE_VERSION,
+        "source_size": stat.st_size,
+        "source_mtime_ns": stat.st_mtime_ns,
+        "weighted": weighted,
+        "directed": directed,
+    }
+    cache_path = f"{path}.csr"
+    meta_path = os.path.join(cache_path, "meta.json")
+
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            if json.load(f) == meta:
+                return CSRGraph.load(cache_path)
+
+    graph = read_edg(path, weighted=weighted, directed=directed)
+    shutil.rmtree(cache_path, ignore_errors=True)
+    graph.save(cache_path)
+    # Written last, so an interrupted save is never mistaken for a valid cache
+    with open(meta_path, "w") as f:
+        json.dump(meta, f)
+
+    return graph
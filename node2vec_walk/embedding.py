@@ -0,0 +1,97 @@
+import struct
+
+import numpy as np
+
+# Fixed size little endian header, then the (num_nodes, dim) float32 matrix in
+# row major order and the node ids at ids_offset:
+# magic, version, id dtype, num_nodes, dim, ids_offset, padding to 64 bytes
+MAGIC = b"N2VEMBED"
+VERSION = 1
+HEADER = struct.Struct("<8sI8sQIQ24x")
+
+
+def read_emd(path):
+    # word2vec style text output ("num_nodes dim" line, then "id x_1 .. x_dim"
+    # per node) as (ids, vectors). Numeric ids are parsed as floats in one
+    # call, others fall back to reading the table as strings
+    try:
+        table = np.loadtxt(path, skiprows=1, ndmin=2)
+    except ValueError:
+        table = np.loadtxt(path, dtype=str, skiprows=1, ndmin=2)
+        return table[:, 0], table[:, 1:].astype(np.float32)
+
+    ids = table[:, 0]
+    if np.array_equal(ids, ids.round()):
+        ids = ids.astype(np.int64)
+    return ids, table[:, 1:].astype(np.float32)
+
+
+def write_embedding(path, vectors, ids=None):
+    vectors = np.ascontiguousarray(vectors, dtype="<f4")
+    num_nodes, dim = vectors.shape
+    ids = np.arange(num_nodes) if ids is None else np.asarray(ids)
+    if ids.dtype.kind in "OU":
+        ids = ids.astype(str)
+    ids = ids.astype(ids.dtype.newbyteorder("<"))
+
+    ids_offset = HEADER.size + vectors.nbytes
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, ids.dtype.str.encode(), num_nodes, dim, ids_offset))
+        f.write(vectors.tobytes())
+        f.write(ids.tobytes())
+
+
+def emd_to_binary(src, dst):
+    ids, vectors = read_emd(src)
+    write_embedding(dst, vectors, ids)
+    return dst
+
+
+class Embedding:
+    # Memory mapped embedding; vectors is a zero copy (num_nodes, dim) float32
+    # view of the file and ids[i] the node of row i
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise ValueError(f"{path} is too short to be an embedding")
+
+        magic, version, id_dtype, num_nodes, dim, ids_offset = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an embedding")
+        if version != VERSION:
+            raise ValueError(f"Unsupported embedding version {version}")
+
+        self.path = path
+        id_dtype = np.dtype(id_dtype.rstrip(b"\0").decode())
+        if num_nodes:
+            self.vectors = np.memmap(path, dtype="<f4", mode="r", offset=HEADER.size, shape=(num_nodes, dim))
+            self.ids = np.memmap(path, dtype=id_dtype, mode="r", offset=ids_offset, shape=(num_nodes,))
+        else:
+            self.vectors = np.empty((0, dim), dtype="<f4")
+            self.ids = np.empty(0, dtype=id_dtype)
+        self._sorter = None
+
+    @property
+    def dim(self):
+        return self.vectors.shape[1]
+
+    def __len__(self):
+        return self.vectors.shape[0]
+
+    def index(self, ids):
+        # Rows of the given node ids, KeyError for ids that are not stored
+        if self._sorter is None:
+            self._sorter = np.argsort(self.ids, kind="stable")
+        ids = np.asarray(ids)
+        flat = ids.reshape(-1)
+        rows = np.searchsorted(self.ids, flat, sorter=self._sorter)
+        found = rows < len(self)
+        rows[found] = self._sorter[rows[found]]
+        found[found] = self.ids[rows[found]] == flat[found]
+        if not found.all():
+            raise KeyError(f"node ids not in the embedding: {flat[~found][:10].tolist()}")
+        return rows.reshape(ids.shape)
+
+    def __getitem__(self, ids):
+        return self.vectors[self.index(ids)]
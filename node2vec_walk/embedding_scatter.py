@@ -0,0 +1,76 @@
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+from manim import *
+
+# Shared helpers (vizutils) live at the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from embedding import Embedding, emd_to_binary
+from graph_layout import rescale
+from projection import kmeans, pca, thin_to_grid
+from walker_cloud import WalkerCloud
+from vizutils.profiling import ProfiledScene
+from vizutils.tex_prewarm import PrewarmedScene
+
+# Embedding to show, in the binary format of embedding.py or as .emd text
+# (converted to .emb next to it once). None shows a synthetic embedding of
+# NUM_NODES nodes in NUM_COMMUNITIES clusters
+EMBEDDING = None
+NUM_NODES = 20000
+DIM = 16
+NUM_COMMUNITIES = 8
+NUM_LABELS = 24
+SCATTER_SCALE = 3.4
+COMMUNITY_COLORS = [BLUE, RED, GREEN, YELLOW, PURPLE, ORANGE, TEAL, PINK]
+TEST = False
+
+
+def synthetic_embedding(num_nodes=NUM_NODES, dim=DIM, num_communities=NUM_COMMUNITIES, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(0, 3, (num_communities, dim))
+    community = rng.integers(0, num_communities, num_nodes)
+    vectors = centers[community] + rng.normal(0, 1, (num_nodes, dim))
+    return np.arange(num_nodes), vectors.astype(np.float32)
+
+
+def load_embedding(path=EMBEDDING):
+    # (ids, vectors), the vectors memory mapped for embedding files
+    if path is None:
+        return synthetic_embedding()
+    if path.endswith(".emd"):
+        emb_path = path[:-len(".emd")] + ".emb"
+        if not os.path.exists(emb_path) or os.path.getmtime(emb_path) < os.path.getmtime(path):
+            emd_to_binary(path, emb_path)
+        path = emb_path
+    emb = Embedding(path)
+    return emb.ids, emb.vectors
+
+
+class EmbeddingScatter(PrewarmedScene, ProfiledScene, Scene):
+    def construct(self):
+        ids, vectors = load_embedding()
+        pos = rescale(pca(vectors), SCATTER_SCALE)
+        pos = np.column_stack((pos, np.zeros(len(pos))))
+        communities = kmeans(vectors, NUM_COMMUNITIES, iterations=10 if not TEST else 2)
+
+        # One point per pixel at most, whatever the number of nodes
+        keep = thin_to_grid(pos, config.frame_width / config.pixel_width)
+        palette = np.array([color_to_rgba(color, 0.8) for color in COMMUNITY_COLORS])
+        cloud = WalkerCloud(pos[keep], rgbas=palette[communities[keep] % len(palette)], stroke_width=2)
+
+        title = Text(f"{len(ids):,} nodes, {NUM_COMMUNITIES} communities", font_size=28).to_corner(UL)
+        self.play(FadeIn(cloud), Write(title))
+        self.wait(1 if not TEST else 0.1)
+
+        # Node ids for a random sample only
+        sample = np.random.default_rng(0).choice(len(ids), min(NUM_LABELS, len(ids)), replace=False)
+        labels = VGroup(*[
+            Text(str(ids[i]), font_size=14).move_to(pos[i]).shift(0.15 * UP)
+            for i in sample
+        ])
+        dots = VGroup(*[Dot(pos[i], radius=0.03, color=WHITE) for i in sample])
+        self.play(FadeIn(dots), FadeIn(labels))
+        self.wait(3 if not TEST else 0.1)
@@ -0,0 +1,120 @@
+import hashlib
+import os
+
+import numpy as np
+
+from csr_graph import CSRGraph
+
+LAYOUT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".layout_cache")
+# Kamada-Kawai is O(n^3), larger graphs switch to the force directed layout
+KAMADA_KAWAI_MAX_NODES = 500
+
+
+def graph_hash(nxg, *params):
+    h = hashlib.sha1()
+    h.update(repr(list(nxg.nodes)).encode())
+    h.update(repr(list(nxg.edges(data=True))).encode())
+    h.update(repr(params).encode())
+    return h.hexdigest()
+
+
+def force_directed_layout(graph, iterations=100, grid=None, seed=0):
+    # Fruchterman-Reingold with a one level Barnes-Hut approximation: nodes in
+    # other cells of a grid x grid partition only repel through the cell
+    # centroid, nodes sharing a cell repel each other exactly. About sqrt(n)
+    # cells balances the two, i.e. O(n^1.5) per iteration instead of O(n^2)
+    n = graph.num_nodes
+    grid = grid or max(4, int(round(n ** 0.25)))
+    rng = np.random.default_rng(seed)
+    pos = rng.uniform(-1, 1, (n, 2))
+    if n < 2:
+        return pos
+
+    k = np.sqrt(4 / n)
+    src = np.repeat(np.arange(n), graph.degree)
+    dst = graph.indices
+    weights = graph.data if graph.weighted else np.ones(dst.size)
+
+    chunk = max(1, 2 ** 20 // (grid * grid))
+    for temperature in np.linspace(0.1, 0.001, iterations):
+        lo, hi = pos.min(0), pos.max(0)
+        cell_xy = ((pos - lo) / (hi - lo + 1e-12) * grid).astype(np.int64).clip(0, grid - 1)
+        cell = cell_xy[:, 0] * grid + cell_xy[:, 1]
+
+        mass = np.bincount(cell, minlength=grid * grid).astype(np.float64)
+        centroid = np.stack([np.bincount(cell, pos[:, d], grid * grid) for d in range(2)], 1)
+        occupied = mass > 0
+        centroid[occupied] /= mass[occupied, None]
+        mass, centroid = mass[occupied], centroid[occupied]
+        cell_rank = np.cumsum(occupied) - 1
+
+        disp = np.zeros_like(pos)
+
+        # Far field: every occupied cell but the node's own
+        for start in range(0, n, chunk):
+            rows = slice(start, start + chunk)
+            dx = pos[rows, 0, None] - centroid[:, 0]
+            dy = pos[rows, 1, None] - centroid[:, 1]
+            scale = mass / (dx * dx + dy * dy + 1e-9)
+            scale[np.arange(scale.shape[0]), cell_rank[cell[rows]]] = 0
+            # sum_c scale_c (pos - centroid_c), without the (rows, cells, 2) array
+            disp[rows] += k * k * (pos[rows] * scale.sum(1)[:, None] - scale @ centroid)
+
+        # Near field: exact repulsion between nodes of the same cell
+        order = np.argsort(cell, kind="stable")
+        bounds = np.flatnonzero(np.diff(cell[order])) + 1
+        for members in np.split(order, bounds):
+            if members.size > 1:
+                p = pos[members]
+                dx = p[:, 0, None] - p[:, 0]
+                dy = p[:, 1, None] - p[:, 1]
+                scale = 1 / (dx * dx + dy * dy + 1e-9)
+                np.fill_diagonal(scale, 0)
+                disp[members] += k * k * (p * scale.sum(1)[:, None] - scale @ p)
+
+        # Attraction along edges
+        delta = pos[dst] - pos[src]
+        scale = np.sqrt((delta ** 2).sum(-1)) * weights / k
+        for d in range(2):
+            disp[:, d] += np.bincount(src, scale * delta[:, d], n)
+
+        length = np.sqrt((disp ** 2).sum(-1)) + 1e-12
+        pos += disp / length[:, None] * np.minimum(length, temperature)[:, None]
+
+    return pos
+
+
+def rescale(pos, scale):
+    pos = pos - pos.mean(0)
+    lim = np.abs(pos).max()
+    return pos * scale / lim if lim > 0 else pos
+
+
+def get_layout(nxg, layout="auto", scale=1, cache_dir=LAYOUT_CACHE_DIR, **layout_config):
+    # Node positions as a {node: [x, y, 0]} dict that Graph.from_networkx takes
+    # as a precomputed layout, cached on disk by graph and layout parameters
+    if layout == "auto":
+        layout = "kamada_kawai" if len(nxg) <= KAMADA_KAWAI_MAX_NODES else "force"
+
+    key = graph_hash(nxg, layout, scale, sorted(layout_config.items()))
+    path = None if cache_dir is None else os.path.join(cache_dir, f"{key}.npy")
+
+    if path is not None and os.path.exists(path):
+        pos = np.load(path)
+    else:
+        if layout == "kamada_kawai":
+            import networkx as nx
+
+            pos_dict = nx.kamada_kawai_layout(nxg, scale=scale, **layout_config)
+            pos = np.array([pos_dict[node] for node in nxg], dtype=np.float64).reshape(-1, 2)
+        elif layout == "force":
+            graph = CSRGraph.from_networkx(nxg, weight="weight")
+            pos = rescale(force_directed_layout(graph, **layout_config), scale)
+        else:
+            raise ValueError(f"Unknown layout {layout!r}, expected 'kamada_kawai' or 'force'")
+
+        if path is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            np.save(path, pos)
+
+    return {node: np.append(xy, 0) for node, xy in zip(nxg, pos)}
@@ -1,8 +1,26 @@
 import random
+import sys
+from pathlib import Path
 
-import networkx as nx
+import numpy as np
 from manim import *
 
+# Shared helpers (vizutils) live at the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from csr_graph import CSRGraph
+from edgelist import load_edg
+from graph_layout import get_layout
+from node2vec import Node2VecWalker
+from random_walk import RandomWalker
+from toy_graph import toy_networkx
+from transition import WalkChain
+from walk_animation import FollowWalks
+from walker_cloud import WalkerCloud
+from vizutils.profiling import ProfiledScene
+from vizutils.tex_cache import cached_math_tex, cached_tex
+from vizutils.tex_prewarm import PrewarmedScene
+
 GRAPH_POS = 2.8 * LEFT + 0.3 * UP
 WALKER_POS = RIGHT
 WALK_LENGTH = 24
@@ -10,6 +28,9 @@ TEST = False
 WALK_HIST_RECORD_LENGTH = 8
 WALK_HIST_POS = 1.2 * RIGHT + 2.5 * UP
 WALK_HIST_FONT_SIZE = 30
+NUM_CLOUD_WALKERS = 1000
+# Optional .edg file to walk on instead of the hardcoded toy graph
+EDGELIST = None
 
 
 def get_walker(pos=WALKER_POS, color=BLUE):
@@ -19,36 +40,52 @@ def get_walker(pos=WALKER_POS, color=BLUE):
     return walker
 
 
-def get_graph():
-    nodes = list(range(10))
-    edges = [
-        (0, 1),
-        (1, 2),
-        (1, 3),
-        (2, 3),
-        (3, 4),
-        (4, 5),
-        (4, 6),
-        (2, 7),
-        (7, 8),
-        (8, 9),
-    ]
-
-    nxg = nx.Graph()
-    nxg.add_nodes_from(nodes)
-    nxg.add_edges_from(edges)
+def get_graph(weighted=False, edgelist=EDGELIST):
+    if edgelist is not None:
+        nxg = load_edg(edgelist, weighted=weighted).to_networkx()
+    else:
+        nxg = toy_networkx(weighted)
 
     g = Graph.from_networkx(
         nxg,
-        layout="kamada_kawai",
+        layout=get_layout(nxg, scale=3.4),
         labels=True,
-        layout_scale=3.4,
     ).shift(GRAPH_POS)
 
     return nxg, g
 
 
-class RandomWalkOnGraph(Scene):
+def get_weight_labels(nxg, g, font_size=24, color=GREEN):
+    labels = VGroup()
+    for u, v, w in nxg.edges(data="weight", default=1):
+        label = cached_math_tex(str(w), font_size=font_size, color=color)
+        label.move_to(g.edges[(u, v)].get_center()).shift(0.2 * UP)
+        labels.add(label)
+    return labels
+
+
+def get_walks(nxg, init_nodes, walk_length, p=1, q=1):
+    # Draw from the global random state, i.e. the same walks as calling
+    # random.choice(list(nxg[cur_node])) for every walker at every step
+    weighted = all("weight" in attr for _, _, attr in nxg.edges(data=True)) and nxg.number_of_edges() > 0
+    graph = CSRGraph.from_networkx(nxg, weight="weight" if weighted else None)
+    if p == q == 1:
+        walker = RandomWalker(graph)
+    else:
+        walker = Node2VecWalker(graph, p=p, q=q)
+    walks = walker.walk(graph.index(init_nodes), walk_length + 1, rng=random)
+    return walker.graph.nodes[walks].tolist()
+
+
+def get_trajectory(g, walks):
+    # Node positions and the walks as row indices into them, for FollowWalks
+    nodes = list(g.vertices)
+    node_idx = {node: i for i, node in enumerate(nodes)}
+    node_pos = np.array([g[node].get_center() for node in nodes])
+    return node_pos, np.array([[node_idx[node] for node in walk] for walk in walks])
+
+
+class RandomWalkOnGraph(PrewarmedScene, ProfiledScene, Scene):
     def construct(self):
         random.seed(0)
         init_node = 1
@@ -72,26 +109,36 @@ class RandomWalkOnGraph(Scene):
         txt1 = Text(r"Real random walker", font_size=font_size).shift(txt_pos)
         txt2 = Text(r"Not an actor", font_size=font_size).shift(txt_pos + 0.6 * DOWN)
 
-        # Generate random walk starting from init node
-        cur_node = init_node
-        for i in range(WALK_LENGTH if not TEST else 8):
-            cur_node = random.choice(list(nxg[cur_node]))
-
-            relative_shift = g[cur_node].get_center() - walker.get_center()
-            self.play(walker.animate.shift(relative_shift), run_time=0.8)
+        # Generate random walk starting from init node, then play it back
+        walks = get_walks(nxg, [init_node], WALK_LENGTH if not TEST else 8)
+        node_pos, walks = get_trajectory(g, walks)
+        self.play(
+            FollowWalks(
+                VGroup(walker),
+                node_pos,
+                walks,
+                step_time=0.8,
+                reveal={7: [txt1], 11: [txt2]},
+            )
+        )
 
-            if i == 6:
-                self.add(txt1)
+        self.wait(1)
 
-            if i == 10:
-                self.add(txt2)
 
-        self.wait(1)
+class RandomWalk(PrewarmedScene, ProfiledScene, Scene):
+    # node2vec return (p) and in-out (q) parameters of the recorded walks
+    p = 1
+    q = 1
+    # Walk on the weighted version of the graph, w(u, v) shown on the edges
+    weighted = False
 
+    def setup_graph(self):
+        self.nxg, self.g = get_graph(weighted=self.weighted)
+        if self.weighted:
+            self.add(get_weight_labels(self.nxg, self.g))
 
-class RandomWalk(Scene):
     def setup_scene_single(self, init_node=1, walker_color=BLUE):
-        self.nxg, self.g = get_graph()
+        self.setup_graph()
         self.walker = get_walker(pos=init_node, color=walker_color)
         self.walker.shift(
             self.g[init_node].get_center() - self.walker.get_center()
@@ -99,7 +146,7 @@ class RandomWalk(Scene):
         self.add(self.g, self.walker)
 
     def setup_scene_multi(self, init_nodes=(1,), walker_colors=(BLUE,)):
-        self.nxg, self.g = get_graph()
+        self.setup_graph()
         self.walkers = []
         for init_node, walker_color in zip(init_nodes, walker_colors):
             self.walkers.append(get_walker(pos=init_node, color=walker_color))
@@ -134,12 +181,12 @@ class TransitionProbability(RandomWalk):
         )
         self.wait(5)
 
-        eqn1 = MathTex(
+        eqn1 = cached_math_tex(
             r"\mathbb{P}(v \in \mathcal{N}(u) | u) = \frac1{|\mathcal{N}(u)|}",
             font_size=eqn_font_size
         ).shift(eqn_pos)
 
-        eqn2 = MathTex(
+        eqn2 = cached_math_tex(
             r"\Rightarrow \mathbb{P}(n_3 | n_1) = \mathbb{P}(n_2 | n_1) = \mathbb{P}(n_0 | n_1) = \frac13",
             font_size=eqn_font_size
         ).shift(eqn_pos + DOWN)
@@ -149,7 +196,7 @@ class TransitionProbability(RandomWalk):
             font_size=eqn_font_size
         ).shift(eqn_pos + 2.5 * DOWN)
 
-        eqn4 = MathTex(
+        eqn4 = cached_math_tex(
             r"\mathbb{P}(v \in \mathcal{N}(u) | u) = \frac{w(u,v)}{\sum_{v' \in \mathcal{N}(u)}w(u, v')}",
             font_size=eqn_font_size
         ).shift(eqn_pos + 3.5 * DOWN)
@@ -226,18 +273,18 @@ class TransitionProbabilitySecondOrder(RandomWalk):
         box_return = SurroundingRectangle(txt_return, color=RED)
 
         # Setup example with current node = n1, and previous node = n3
-        txt_ex = MathTex(
+        txt_ex = cached_math_tex(
             r"Example: ",
             font_size=eqn_font_size,
         ).next_to(txt_in, DOWN).align_to(title, LEFT).shift(0.2 * DOWN)
 
-        txt_cur = MathTex(
+        txt_cur = cached_math_tex(
             r"\text{current node } (u) = n_1,\ ",
             font_size=eqn_font_size,
         ).next_to(txt_ex, RIGHT)
         box_cur = SurroundingRectangle(self.g[1])
 
-        txt_prev = MathTex(
+        txt_prev = cached_math_tex(
             r"\text{previous node } (x) = n_3",
             font_size=eqn_font_size,
         ).next_to(txt_cur, RIGHT)
@@ -318,7 +365,7 @@ class TransitionProbabilitySecondOrder(RandomWalk):
         self.wait(4)
 
         # Dsiplay biased transition probability equation
-        txt_apply = MathTex(
+        txt_apply = cached_math_tex(
             r"\text{Apply bias factor }\alpha_{p,q}(x,v) ",
             r"&=1 &\text{if } d_G(x,v) = 1\\",
             r"&=1/q &\text{if } d_G(x,v) = 2\\",
@@ -330,7 +377,7 @@ class TransitionProbabilitySecondOrder(RandomWalk):
         self.wait(5)
 
         # Formula for 2nd order transition probability
-        eqn_tran_prob = MathTex(
+        eqn_tran_prob = cached_math_tex(
             r"\mathbb{P}(v | u, x) = "
             r"\frac{\alpha_{p,q}(x,v)w(u,v)}"
             r"{\sum_{v' \in \mathcal{N}(u)}\alpha_{p,q}(x,v')w(u, v')}",
@@ -354,9 +401,15 @@ class RecordSingleRandomWalk(RandomWalk):
         self.setup_scene_single(init_node=init_node, walker_color=walker_color)
 
         # Generate random walk starting from init node
-        cur_node = init_node
+        walk = get_walks(
+            self.nxg,
+            [init_node],
+            WALK_LENGTH if not TEST else 12,
+            p=self.p,
+            q=self.q,
+        )[0]
         self.add(
-            Tex(
+            cached_tex(
                 str(init_node),
                 font_size=WALK_HIST_FONT_SIZE,
                 color=walker_color,
@@ -364,28 +417,43 @@ class RecordSingleRandomWalk(RandomWalk):
         )
         self.wait(1 if not TEST else 0.1)
 
-        for i in range(WALK_LENGTH if not TEST else 12):
-            cur_node = random.choice(list(self.nxg[cur_node]))
-
-            relative_shift = self.g[cur_node].get_center() - self.walker.get_center()
-            self.play(self.walker.animate.shift(relative_shift), run_time=0.8)
-            self.wait(0.1)
-
+        # Record walk history, revealed as the walker reaches each node
+        history = {}
+        for i, cur_node in enumerate(walk[1:WALK_HIST_RECORD_LENGTH + 2]):
             if i < WALK_HIST_RECORD_LENGTH:
-                # Record walk history
-                head = MathTex(
+                head = cached_math_tex(
                     f"\\rightarrow {cur_node}",
                     font_size=WALK_HIST_FONT_SIZE,
                     color=walker_color,
-                ).shift(WALK_HIST_POS + (i + 1) * 0.6 * RIGHT)
-                self.add(head)
-            elif i == WALK_HIST_RECORD_LENGTH:
-                head = Tex(
+                )
+            else:
+                head = cached_tex(
                     r"\dots",
                     font_size=WALK_HIST_FONT_SIZE,
                     color=walker_color,
-                ).shift(WALK_HIST_POS + (i + 1) * 0.6 * RIGHT)
-                self.add(head)
+                )
+            history[i + 1] = [head.shift(WALK_HIST_POS + (i + 1) * 0.6 * RIGHT)]
+
+        node_pos, walks = get_trajectory(self.g, [walk])
+        self.play(
+            FollowWalks(
+                VGroup(self.walker),
+                node_pos,
+                walks,
+                step_time=0.8,
+                hold_time=0.1,
+                reveal=history,
+            )
+        )
+
+
+class RecordSingleBiasedRandomWalk(RecordSingleRandomWalk):
+    # Outward (DFS-like) exploration, same q as the PecanPy run in demo.ipynb
+    q = 0.01
+
+
+class RecordSingleWeightedRandomWalk(RecordSingleRandomWalk):
+    weighted = True
 
 
 class RecordMultiRandomWalk(RandomWalk):
@@ -399,17 +467,23 @@ class RecordMultiRandomWalk(RandomWalk):
         self.setup_scene_multi(init_nodes=init_nodes, walker_colors=walker_colors)
 
         # Generate random walk starting from init node
-        cur_nodes = list(init_nodes)
+        walks = get_walks(
+            self.nxg,
+            init_nodes,
+            WALK_LENGTH if not TEST else 12,
+            p=self.p,
+            q=self.q,
+        )
         for i, (init_node, walker_color) in enumerate(zip(init_nodes, walker_colors)):
             self.add(
-                Tex(
+                cached_tex(
                     str(init_node),
                     font_size=WALK_HIST_FONT_SIZE,
                     color=walker_color,
                 ).shift(WALK_HIST_POS + i * 1.1 * DOWN + 0.2 * RIGHT)
             )
         self.add(
-            Tex(
+            cached_tex(
                 r"\vdots",
                 font_size=WALK_HIST_FONT_SIZE,
                 color=WHITE
@@ -417,30 +491,116 @@ class RecordMultiRandomWalk(RandomWalk):
         )
         self.wait(1 if not TEST else 0.1)
 
-        for i in range(WALK_LENGTH if not TEST else 12):
-            group = []
-            for j, walker in enumerate(self.walkers):
-                cur_nodes[j] = random.choice(list(self.nxg[cur_nodes[j]]))
-                relative_shift = self.g[cur_nodes[j]].get_center() - walker.get_center()
-                group.append(walker.animate.shift(relative_shift))
-
-                if i <= WALK_HIST_RECORD_LENGTH:
-                    head = MathTex(
-                        r"\dots" if i == WALK_HIST_RECORD_LENGTH else f"\\rightarrow {cur_nodes[j]}",
-                        font_size=WALK_HIST_FONT_SIZE,
-                        color=walker_colors[j],
-                    ).shift(WALK_HIST_POS + (i + 1) * 0.6 * RIGHT + j * 1.1 * DOWN)
-                    group.append(FadeIn(head))
-
-                    if i < WALK_HIST_RECORD_LENGTH and j == len(self.walkers) - 1:
-                        head = Tex(r"\vdots", font_size=WALK_HIST_FONT_SIZE, color=WHITE)
-                        head.shift(WALK_HIST_POS + (i + 1) * 0.6 * RIGHT + (j + 1) * 1.1 * DOWN + 0.2 * RIGHT)
-                        group.append(FadeIn(head))
-
-            self.play(
-                AnimationGroup(
-                    *group,
-                    lag_ratio=0.1 if i == WALK_HIST_RECORD_LENGTH else 0.2,
-                    run_time=0.7,
-                )
+        # Record walk history, revealed as the walkers reach each node
+        history = {}
+        for i in range(min(len(walks[0]) - 1, WALK_HIST_RECORD_LENGTH + 1)):
+            history[i + 1] = []
+            for j, walk in enumerate(walks):
+                head = cached_math_tex(
+                    r"\dots" if i == WALK_HIST_RECORD_LENGTH else f"\\rightarrow {walk[i + 1]}",
+                    font_size=WALK_HIST_FONT_SIZE,
+                    color=walker_colors[j],
+                ).shift(WALK_HIST_POS + (i + 1) * 0.6 * RIGHT + j * 1.1 * DOWN)
+                history[i + 1].append(head)
+
+            if i < WALK_HIST_RECORD_LENGTH:
+                head = cached_tex(r"\vdots", font_size=WALK_HIST_FONT_SIZE, color=WHITE)
+                head.shift(WALK_HIST_POS + (i + 1) * 0.6 * RIGHT + len(walks) * 1.1 * DOWN + 0.2 * RIGHT)
+                history[i + 1].append(head)
+
+        node_pos, walks = get_trajectory(self.g, walks)
+        self.play(
+            FollowWalks(
+                VGroup(*self.walkers),
+                node_pos,
+                walks,
+                step_time=0.7,
+                reveal=history,
+                fade_time=0.3,
             )
+        )
+
+
+class RecordManyRandomWalk(RandomWalk):
+    def construct(self):
+        random.seed(0)
+        walk_jitter = 0.15
+
+        self.setup_graph()
+        self.add(self.g)
+
+        # Start walkers uniformly over the nodes, each slightly off its node so
+        # that the cloud shows how many walkers sit on every node
+        nodes = list(self.nxg)
+        init_nodes = [nodes[i % len(nodes)] for i in range(NUM_CLOUD_WALKERS)]
+        walks = get_walks(
+            self.nxg,
+            init_nodes,
+            WALK_LENGTH if not TEST else 12,
+            p=self.p,
+            q=self.q,
+        )
+
+        node_pos, walks = get_trajectory(self.g, walks)
+        offsets = np.random.default_rng(0).uniform(-walk_jitter, walk_jitter, (len(walks), 3))
+        offsets[:, 2] = 0
+
+        cloud = WalkerCloud(node_pos[walks[:, 0]] + offsets, colors=BLUE)
+        self.play(FadeIn(cloud))
+        self.wait(1 if not TEST else 0.1)
+
+        self.play(FollowWalks(cloud, node_pos, walks, step_time=0.7, offsets=offsets))
+        self.wait(1)
+
+
+class VisitFrequency(RandomWalk):
+    # Exact visit frequencies from the transition matrix, no walks simulated
+    def construct(self):
+        font_size = 28
+        init_node = 1
+        txt_pos = 2.4 * RIGHT + 2.5 * UP
+
+        self.setup_graph()
+        self.add(self.g)
+        graph = CSRGraph.from_networkx(self.nxg, weight="weight" if self.weighted else None)
+        chain = WalkChain(graph, p=self.p, q=self.q)
+        nodes = graph.nodes.tolist()
+
+        def heat(freq):
+            # A disc behind every node, sized and colored by its share
+            scaled = freq / freq.max()
+            return VGroup(*[
+                Circle(radius=0.25 + 0.35 * s)
+                .set_fill(interpolate_color(BLUE_E, YELLOW, s), opacity=0.8)
+                .set_stroke(width=0)
+                .move_to(self.g[node])
+                for node, s in zip(nodes, scaled)
+            ])
+
+        def values(freq):
+            return VGroup(*[
+                cached_math_tex(f"{f:.2f}", font_size=22, color=YELLOW)
+                .next_to(self.g[node], DR, buff=0.05)
+                for node, f in zip(nodes, freq)
+            ])
+
+        # WALK_LENGTH steps like get_walks, i.e. WALK_LENGTH + 1 positions with the start
+        visits = chain.visit_frequency(graph.index([init_node]), WALK_LENGTH + 1)[:, 0]
+        txt = Text(f"Visits in {WALK_LENGTH} steps from {init_node}", font_size=font_size).shift(txt_pos)
+        discs, labels = heat(visits), values(visits)
+        self.add_to_back(discs)
+        self.play(FadeIn(discs), FadeIn(labels), Write(txt))
+        self.wait(3 if not TEST else 0.1)
+
+        stationary = chain.stationary()[:, 0]
+        txt2 = Text("Stationary distribution", font_size=font_size).shift(txt_pos)
+        self.play(
+            Transform(discs, heat(stationary)),
+            Transform(labels, values(stationary)),
+            Transform(txt, txt2),
+        )
+        self.wait(3 if not TEST else 0.1)
+
+
+class VisitFrequencyBiased(VisitFrequency):
+    q = 0.01
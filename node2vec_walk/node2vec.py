@@ -0,0 +1,85 @@
+import numpy as np
+
+from random_walk import RandomWalker
+from sampling import alias_draw, alias_tables, take, uniform
+
+
+class Node2VecWalker(RandomWalker):
+    # Second order walk biased by alpha_{p,q}(x, v) w(u, v), x being the previous node.
+    # mode="alias" precomputes one alias table per (directed) edge, which takes
+    # sum_{(x, u)} deg(u) memory; mode="rejection" samples on the fly instead
+    def __init__(self, graph, p=1, q=1, mode="alias"):
+        super().__init__(graph)
+        self.p = p
+        self.q = q
+        self.mode = mode
+        # Build the sorted edge keys behind alpha() now rather than on first use
+        graph.has_edge([0], [0])
+
+        if mode == "alias":
+            self._setup_edge_alias()
+        elif mode != "rejection":
+            raise ValueError(f"Unknown mode {mode!r}, expected 'alias' or 'rejection'")
+
+    def alpha(self, prev, nxt):
+        alpha = np.where(self.graph.has_edge(prev, nxt), 1.0, 1 / self.q)
+        alpha[prev == nxt] = 1 / self.p
+        return alpha
+
+    def _setup_edge_alias(self):
+        g = self.graph
+        src = np.repeat(np.arange(g.num_nodes, dtype=np.int64), self.degree)
+
+        # The table of edge e = (x, u) covers the neighbors of u, in CSR order
+        size = self.degree[g.indices]
+        self.edge_ptr = np.zeros(g.num_edges + 1, dtype=np.int64)
+        np.cumsum(size, out=self.edge_ptr[1:])
+
+        shift = np.repeat(g.indptr[g.indices] - self.edge_ptr[:-1], size)
+        nbr_pos = shift + np.arange(self.edge_ptr[-1])
+        weights = self.alpha(np.repeat(src, size), g.indices[nbr_pos])
+        if g.weighted:
+            weights *= g.data[nbr_pos]
+
+        self.edge_prob, self.edge_alias = alias_tables(weights, self.edge_ptr)
+
+    def _sample(self, cur, edges, rng):
+        if edges is None:
+            return super()._sample(cur, edges, rng)
+
+        # Walkers that have not traversed an edge yet take a first order step
+        offsets = np.empty(cur.size, dtype=np.int64)
+        first = edges < 0
+        offsets[first] = super()._sample(cur[first], None, take(rng, first))
+
+        second = np.flatnonzero(~first)
+        cur, edges = cur[second], edges[second]
+        if self.mode == "alias":
+            offsets[second] = alias_draw(
+                self.edge_prob,
+                self.edge_alias,
+                self.edge_ptr[edges],
+                self.degree[cur],
+                take(rng, second),
+            )
+        else:
+            prev = np.searchsorted(self.graph.indptr, edges, side="right") - 1
+            offsets[second] = self._rejection_sample(prev, cur, take(rng, second))
+
+        return offsets
+
+    def _rejection_sample(self, prev, cur, rng):
+        # Propose from the first order transition, accept with prob alpha / max alpha
+        alpha_max = max(1, 1 / self.p, 1 / self.q)
+        offsets = np.empty(cur.size, dtype=np.int64)
+
+        pending = np.arange(cur.size)
+        while pending.size:
+            pending_rng = take(rng, pending)
+            proposal = super()._sample(cur[pending], None, pending_rng)
+            nxt = self.graph.indices[self.graph.indptr[cur[pending]] + proposal]
+            accept = uniform(pending_rng, pending.size) * alpha_max < self.alpha(prev[pending], nxt)
+            offsets[pending[accept]] = proposal[accept]
+            pending = pending[~accept]
+
+        return offsets
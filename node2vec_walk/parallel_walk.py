@@ -0,0 +1,107 @@
+import os
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+
+# Walks are generated in fixed size chunks of start nodes, each with its own
+# random stream, so the output does not depend on the number of workers
+CHUNK_SIZE = 8192
+
+_worker = {}
+
+
+def _new_shared(shape, dtype, blocks):
+    dtype = np.dtype(dtype)
+    shm = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * dtype.itemsize, 1))
+    blocks.append(shm)
+    return (shm.name, shape, dtype.str), np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _to_shared(arr, blocks):
+    spec, shared = _new_shared(arr.shape, arr.dtype, blocks)
+    shared[...] = arr
+    return spec
+
+
+def _from_shared(spec, blocks):
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    blocks.append(shm)
+    return np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _share(obj, blocks):
+    # Picklable description of obj where every array attribute lives in
+    # shared memory, nested objects (e.g. walker.graph) are shared recursively
+    attrs, arrays, children = {}, {}, {}
+    for key, val in vars(obj).items():
+        if isinstance(val, np.ndarray) and val.dtype != object:
+            arrays[key] = _to_shared(val, blocks)
+        elif hasattr(val, "__dict__") and not isinstance(val, type):
+            children[key] = _share(val, blocks)
+        else:
+            attrs[key] = val
+    return type(obj), attrs, arrays, children
+
+
+def _attach(spec, blocks):
+    cls, attrs, arrays, children = spec
+    obj = cls.__new__(cls)
+    obj.__dict__.update(attrs)
+    for key, arr_spec in arrays.items():
+        setattr(obj, key, _from_shared(arr_spec, blocks))
+    for key, child_spec in children.items():
+        setattr(obj, key, _attach(child_spec, blocks))
+    return obj
+
+
+def _init_worker(walker_spec, start_spec, out_spec):
+    blocks = _worker.setdefault("blocks", [])
+    _worker["walker"] = _attach(walker_spec, blocks)
+    _worker["start_nodes"] = _from_shared(start_spec, blocks)
+    _worker["out"] = _from_shared(out_spec, blocks)
+
+
+def _walk_chunk(walker, start_nodes, out, seed_seq, chunk, chunk_size):
+    rows = slice(chunk * chunk_size, (chunk + 1) * chunk_size)
+    rng = np.random.default_rng(np.random.SeedSequence(seed_seq.entropy, spawn_key=(chunk,)))
+    out[rows] = walker.walk(start_nodes[rows], out.shape[1], rng=rng)
+
+
+def _run_chunk(args):
+    _walk_chunk(_worker["walker"], _worker["start_nodes"], _worker["out"], *args)
+
+
+def parallel_walk(walker, start_nodes, walk_length, seed=None, workers=None, chunk_size=CHUNK_SIZE):
+    # Same (n_walkers, walk_length) matrix as walker.walk, generated by a
+    # process pool that attaches to the walker arrays in shared memory
+    start_nodes = np.asarray(start_nodes, dtype=walker.graph.indices.dtype)
+    seed_seq = np.random.SeedSequence(seed)
+    num_chunks = -(-start_nodes.size // chunk_size)
+    workers = min(workers or os.cpu_count(), max(num_chunks, 1))
+
+    if workers == 1:
+        out = np.empty((start_nodes.size, walk_length), dtype=start_nodes.dtype)
+        for chunk in range(num_chunks):
+            _walk_chunk(walker, start_nodes, out, seed_seq, chunk, chunk_size)
+        return out
+
+    blocks = []
+    out = None
+    try:
+        walker_spec = _share(walker, blocks)
+        start_spec = _to_shared(start_nodes, blocks)
+        out_spec, out = _new_shared((start_nodes.size, walk_length), start_nodes.dtype, blocks)
+        tasks = [(seed_seq, chunk, chunk_size) for chunk in range(num_chunks)]
+
+        with Pool(workers, initializer=_init_worker, initargs=(walker_spec, start_spec, out_spec)) as pool:
+            for _ in pool.imap_unordered(_run_chunk, tasks):
+                pass
+
+        return out.copy()
+    finally:
+        # The view has to go before the block backing it can be closed
+        del out
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
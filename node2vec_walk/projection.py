@@ -0,0 +1,76 @@
+import numpy as np
+
+# Rows per chunk, so (memory mapped) embeddings never need a full float64 copy
+CHUNK_SIZE = 65536
+
+
+def _chunks(n, chunk_size):
+    for start in range(0, n, chunk_size):
+        yield slice(start, min(start + chunk_size, n))
+
+
+def pca(x, n_components=2, chunk_size=CHUNK_SIZE):
+    # Exact PCA through the dim x dim covariance, accumulated chunk by chunk:
+    # O(n dim^2) and one pass over x for the covariance, one for the projection
+    n, dim = x.shape
+    mean = np.zeros(dim)
+    for rows in _chunks(n, chunk_size):
+        mean += np.asarray(x[rows], dtype=np.float64).sum(0)
+    mean /= max(n, 1)
+
+    cov = np.zeros((dim, dim))
+    for rows in _chunks(n, chunk_size):
+        xc = np.asarray(x[rows], dtype=np.float64) - mean
+        cov += xc.T @ xc
+
+    # eigh sorts eigenvalues in ascending order
+    _, vecs = np.linalg.eigh(cov)
+    components = vecs[:, ::-1][:, :n_components]
+    # Fix the sign of each axis so reruns do not mirror the picture
+    components *= np.where(components[np.abs(components).argmax(0), range(n_components)] < 0, -1, 1)
+
+    out = np.empty((n, n_components))
+    for rows in _chunks(n, chunk_size):
+        out[rows] = (np.asarray(x[rows], dtype=np.float64) - mean) @ components
+    return out
+
+
+def kmeans(x, k, iterations=10, seed=0, chunk_size=CHUNK_SIZE):
+    # Lloyd's algorithm from a k-means++ start on a sample of the rows,
+    # assignments by ||x||^2 - 2 x.c + ||c||^2 per chunk; empty clusters keep
+    # their previous center
+    n = x.shape[0]
+    rng = np.random.default_rng(seed)
+    sample = np.asarray(x[np.sort(rng.choice(n, min(n, 10000), replace=False))], dtype=np.float64)
+    centers = [sample[rng.integers(sample.shape[0])]]
+    d2 = ((sample - centers[0]) ** 2).sum(1)
+    for _ in range(1, min(k, n)):
+        p = d2 / d2.sum() if d2.sum() > 0 else None
+        centers.append(sample[rng.choice(sample.shape[0], p=p)])
+        d2 = np.minimum(d2, ((sample - centers[-1]) ** 2).sum(1))
+    centers = np.array(centers)
+    labels = np.zeros(n, dtype=np.int64)
+
+    for _ in range(iterations):
+        sums = np.zeros_like(centers)
+        counts = np.zeros(centers.shape[0])
+        c_sq = (centers ** 2).sum(1)
+        for rows in _chunks(n, chunk_size):
+            xc = np.asarray(x[rows], dtype=np.float64)
+            labels[rows] = (c_sq - 2 * xc @ centers.T).argmin(1)
+            onehot = labels[rows, None] == np.arange(centers.shape[0])
+            sums += onehot.T.astype(np.float64) @ xc
+            counts += onehot.sum(0)
+        nonempty = counts > 0
+        centers[nonempty] = sums[nonempty] / counts[nonempty, None]
+
+    return labels
+
+
+def thin_to_grid(pos, cell):
+    # Indices of one point per occupied cell x cell square: points closer than
+    # a pixel are drawn on top of each other anyway, so the number of points
+    # drawn is bounded by the frame resolution instead of the node count
+    xy = np.floor((pos[:, :2] - pos[:, :2].min(0)) / cell).astype(np.int64)
+    keys = xy[:, 0] * (xy[:, 1].max() + 1) + xy[:, 1]
+    return np.sort(np.unique(keys, return_index=True)[1])
@@ -0,0 +1,66 @@
+import numpy as np
+
+from sampling import CounterRNG, alias_draw, alias_tables, get_rng, randbelow, set_step, take
+
+
+class RandomWalker:
+    def __init__(self, graph):
+        self.graph = graph
+        self.degree = graph.degree
+
+        # Weighted graphs get one alias table per node, laid out like indices
+        if graph.weighted:
+            self.prob, self.alias = alias_tables(graph.data, graph.indptr)
+
+    def walk(self, start_nodes, walk_length, rng=None):
+        # Advance all walkers together, one column of the walk matrix per step;
+        # walks include the start node, walkers stuck at dead ends stay put
+        rng = get_rng(rng)
+        start_nodes = np.asarray(start_nodes, dtype=self.graph.indices.dtype)
+
+        walks = np.empty((start_nodes.size, walk_length), dtype=start_nodes.dtype)
+        if walk_length > 0:
+            walks[:, 0] = start_nodes
+
+        # edges holds the CSR position of the edge each walker last traversed
+        edges = None
+        for i in range(1, walk_length):
+            set_step(rng, i)
+            walks[:, i], edges = self._step(walks[:, i - 1], edges, rng)
+
+        return walks
+
+    def counter_walk(self, start_nodes, walk_length, seed=0, walk_index=0):
+        # Walk number walk_index of every start node from a counter based
+        # stream: a walk only depends on (seed, start node, walk index), so any
+        # one of them can be regenerated on its own in O(walk_length)
+        start_nodes = np.asarray(start_nodes, dtype=self.graph.indices.dtype)
+        rng = CounterRNG.for_walks(seed, start_nodes, walk_index)
+        return self.walk(start_nodes, walk_length, rng=rng)
+
+    def iter_walks(self, start_nodes, walk_length, batch_size=8192, rng=None):
+        # Walks in batches of batch_size rows, drawn from a single random stream
+        rng = get_rng(rng)
+        start_nodes = np.asarray(start_nodes)
+        for i in range(0, start_nodes.size, batch_size):
+            rows = slice(i, i + batch_size)
+            yield self.walk(start_nodes[rows], walk_length, rng=take(rng, rows))
+
+    def _step(self, cur, edges, rng):
+        nxt = cur.copy()
+        nxt_edges = np.full(cur.size, -1, dtype=np.int64)
+
+        moving = np.flatnonzero(self.degree[cur] > 0)
+        cur = cur[moving]
+        edges = None if edges is None else edges[moving]
+        pos = self.graph.indptr[cur] + self._sample(cur, edges, take(rng, moving))
+        nxt[moving] = self.graph.indices[pos]
+        nxt_edges[moving] = pos
+
+        return nxt, nxt_edges
+
+    def _sample(self, cur, edges, rng):
+        # Offset of the next node within the neighbor list of each current node
+        if self.graph.weighted:
+            return alias_draw(self.prob, self.alias, self.graph.indptr[cur], self.degree[cur], rng)
+        return randbelow(rng, self.degree[cur])
@@ -0,0 +1,142 @@
+import numpy as np
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+# Fixed point scale of the probabilities built by alias_tables
+ALIAS_SCALE = 2 ** 32
+
+
+def _mix(z):
+    # SplitMix64 finalizer, a bijective avalanche on uint64 arrays
+    z = np.asarray(z, dtype=np.uint64)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+class CounterRNG:
+    # Counter based random numbers: draw number slot of step step for the
+    # walker with key k is a hash of (k, step, slot), so a walk only depends on
+    # its own key and can be regenerated alone. Subsets of walkers share the
+    # step/slot counters with the batch they were taken from (take); the walk
+    # code makes the same sequence of draw calls for every walker, so a
+    # walker's slots do not depend on the other walkers in the batch
+    def __init__(self, keys, counters=None):
+        self.keys = np.asarray(keys, dtype=np.uint64)
+        self.counters = {"step": 0, "slot": 0} if counters is None else counters
+
+    @classmethod
+    def for_walks(cls, seed, start_nodes, walk_index=0):
+        # One key per (seed, start node, walk index), e.g. the r-th walk of a node
+        with np.errstate(over="ignore"):
+            key = _mix(np.uint64(seed) + _GOLDEN)
+            key = _mix(key ^ (np.asarray(start_nodes, dtype=np.uint64) + _GOLDEN))
+            key = _mix(key ^ (np.asarray(walk_index, dtype=np.uint64) * _GOLDEN))
+        return cls(np.broadcast_to(key, np.shape(start_nodes)).copy())
+
+    def take(self, idx):
+        return CounterRNG(self.keys[idx], self.counters)
+
+    def set_step(self, step):
+        self.counters["step"] = step
+        self.counters["slot"] = 0
+
+    def random(self, size=None):
+        if size is not None and size != self.keys.size:
+            raise ValueError(f"CounterRNG draws one number per walker ({self.keys.size}), not {size}")
+        # step may also be an array with one step per walker
+        step = np.asarray(self.counters["step"], dtype=np.uint64)
+        counter = (step << np.uint64(32)) + np.uint64(self.counters["slot"])
+        self.counters["slot"] += 1
+        with np.errstate(over="ignore"):
+            bits = _mix(self.keys ^ _mix(counter + _GOLDEN))
+        # Top 53 bits as a float in [0, 1)
+        return (bits >> np.uint64(11)) * (1.0 / 2 ** 53)
+
+
+def get_rng(seed=None):
+    # Python's random module (or a random.Random instance) is accepted as is so
+    # that walks match the ones drawn by random.choice(list(nxg[cur_node]))
+    if isinstance(seed, (np.random.Generator, CounterRNG)) or hasattr(seed, "randrange"):
+        return seed
+    return np.random.default_rng(seed)
+
+
+def take(rng, idx):
+    # The random stream for a subset of the walkers of a batch
+    return rng.take(idx) if isinstance(rng, CounterRNG) else rng
+
+
+def set_step(rng, step):
+    if isinstance(rng, CounterRNG):
+        rng.set_step(step)
+
+
+def randbelow(rng, n):
+    if isinstance(rng, (np.random.Generator, CounterRNG)):
+        return (rng.random(n.size) * n).astype(np.int64)
+    return np.fromiter((rng.randrange(k) for k in n), dtype=np.int64, count=n.size)
+
+
+def uniform(rng, size):
+    if isinstance(rng, (np.random.Generator, CounterRNG)):
+        return rng.random(size)
+    return np.fromiter((rng.random() for _ in range(size)), dtype=np.float64, count=size)
+
+
+def alias_tables(weights, indptr):
+    # One alias table per segment weights[indptr[i]:indptr[i + 1]], flattened
+    # so that the table of segment i lives at the same positions. All tables
+    # are built at once with the sweep form of the alias method: the light
+    # items (p < 1) and heavy items (p >= 1) of a segment are paired up in
+    # index order, each light taking its deficit 1 - p from the heavy whose
+    # stretch of the running excess it starts in, and a heavy left with less
+    # than 1 keeps the rest and aliases to the next heavy. The probabilities
+    # are fixed point (ALIAS_SCALE) so the running sums are exact
+    weights = np.asarray(weights, dtype=np.float64)
+    indptr = np.asarray(indptr, dtype=np.int64)
+    degree = np.diff(indptr)
+    seg = np.repeat(np.arange(degree.size), degree)
+    local = np.arange(weights.size, dtype=np.int64) - indptr[seg]
+    alias = local.astype(np.int32)
+
+    total = np.bincount(seg, weights, minlength=degree.size)[seg]
+    p = np.floor(weights * degree[seg] / np.where(total > 0, total, 1) * ALIAS_SCALE).astype(np.int64)
+    p[total <= 0] = ALIAS_SCALE
+    # The rounding shortfall of a segment goes to its largest item
+    if weights.size:
+        starts, counts = indptr[:-1][degree > 0], degree[degree > 0]
+        top = np.flatnonzero(p == np.repeat(np.maximum.reduceat(p, starts), counts))
+        top = top[np.r_[True, np.diff(seg[top]) > 0]]
+        p[top] += counts * ALIAS_SCALE - np.add.reduceat(p, starts)
+
+    prob = np.full(weights.size, ALIAS_SCALE, dtype=np.int64)
+    light = np.flatnonzero(p < ALIAS_SCALE)
+    heavy = np.flatnonzero(p >= ALIAS_SCALE)
+    if light.size:
+        # Running deficit of the lights and excess of the heavies; both reach
+        # the same total at the end of every segment
+        deficit = np.cumsum(ALIAS_SCALE - p[light])
+        excess = np.cumsum(p[heavy] - ALIAS_SCALE)
+        start = deficit - (ALIAS_SCALE - p[light])
+        prob[light] = p[light]
+        alias[light] = local[heavy[np.searchsorted(excess, start, side="right")]]
+
+        # A heavy runs out inside the deficit of light t, its own cell keeps
+        # what is left and the next heavy covers the rest; the last heavy of a
+        # segment always runs out at a light boundary and keeps prob 1
+        donor = np.arange(heavy.size - 1)
+        t = np.searchsorted(deficit, excess[donor], side="right")
+        inside = t < light.size
+        donor, t = donor[inside], t[inside]
+        inside = start[t] < excess[donor]
+        donor, t = donor[inside], t[inside]
+        prob[heavy[donor]] = ALIAS_SCALE - (deficit[t] - excess[donor])
+        alias[heavy[donor]] = local[heavy[donor + 1]]
+
+    return prob / ALIAS_SCALE, alias
+
+
+def alias_draw(prob, alias, start, size, rng):
+    offsets = randbelow(rng, size)
+    pos = start + offsets
+    return np.where(uniform(rng, size.size) < prob[pos], offsets, alias[pos])
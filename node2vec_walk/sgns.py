@@ -0,0 +1,177 @@
+import os
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+from embedding import write_embedding
+from parallel_walk import CHUNK_SIZE, _attach, _from_shared, _share, _to_shared
+
+# Training pairs per vectorized update, at most the number of nodes (and at
+# least MIN_BATCH_SIZE) so that a row rarely takes many summed steps at once
+BATCH_SIZE = 4096
+MIN_BATCH_SIZE = 32
+
+_worker = {}
+
+
+def _log_sigmoid(x):
+    return -np.logaddexp(0, -x)
+
+
+def _sigmoid(x):
+    # Stable for any x, unlike 1 / (1 + exp(-x))
+    return 0.5 * (1 + np.tanh(0.5 * x))
+
+
+def _scatter_add(target, rows, cols, weights, values):
+    # target[rows[j]] += weights[j] * values[cols[j]] with repeated rows
+    # summed, as one sparse product instead of materializing every weighted
+    # row of values
+    import scipy.sparse as sp
+
+    uniq, inv = np.unique(rows, return_inverse=True)
+    hits = sp.csr_matrix((weights.astype(values.dtype), (inv, cols)), shape=(uniq.size, values.shape[0]))
+    target[uniq] += hits @ values
+
+
+class SkipGram:
+    # Skip-gram with negative sampling (word2vec SGNS) over node indices.
+    # vectors are the node embeddings, context the output weights; negatives
+    # are drawn from the noise distribution noise^ns_exponent
+    def __init__(self, num_nodes, dim=128, window=10, negative=5, lr=0.025, min_lr=1e-4, seed=None):
+        rng = np.random.default_rng(seed)
+        self.window = window
+        self.negative = negative
+        self.lr = lr
+        self.min_lr = min_lr
+        self.vectors = ((rng.random((num_nodes, dim)) - 0.5) / dim).astype(np.float32)
+        self.context = np.zeros((num_nodes, dim), dtype=np.float32)
+        self.noise_cdf = np.linspace(1 / num_nodes, 1, num_nodes)
+
+    def set_noise(self, counts, ns_exponent=0.75):
+        # counts are node frequencies in the walks; for walks on an undirected
+        # graph the degree is proportional to them and known up front
+        p = np.asarray(counts, dtype=np.float64) ** ns_exponent
+        self.noise_cdf = np.cumsum(p) / p.sum()
+        return self
+
+    def pairs(self, walks, rng):
+        # (center, context) pairs of every position with the ones up to b steps
+        # away, b drawn uniformly from 1..window per position as in word2vec
+        reach = rng.integers(1, self.window + 1, walks.shape)
+        centers, contexts = [], []
+        for d in range(1, min(self.window, walks.shape[1] - 1) + 1):
+            fwd = reach[:, :-d] >= d
+            bwd = reach[:, d:] >= d
+            centers += [walks[:, :-d][fwd], walks[:, d:][bwd]]
+            contexts += [walks[:, d:][fwd], walks[:, :-d][bwd]]
+        if not centers:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty
+        return np.concatenate(centers), np.concatenate(contexts)
+
+    def update(self, centers, contexts, lr, rng):
+        # One SGD step on a batch of pairs, each with its own negatives; rows
+        # hit several times in the batch get the sum of their updates
+        negatives = np.searchsorted(self.noise_cdf, rng.random((centers.size, self.negative)))
+        targets = np.column_stack((contexts, negatives.clip(max=self.noise_cdf.size - 1)))
+        labels = np.zeros(targets.shape, dtype=np.float32)
+        labels[:, 0] = 1
+
+        v = self.vectors[centers]
+        u = self.context[targets]
+        score = np.einsum("md,mkd->mk", v, u)
+        g = (labels - _sigmoid(score)) * lr
+
+        pairs = np.arange(centers.size)
+        _scatter_add(self.vectors, centers, pairs, np.ones(centers.size), np.einsum("mk,mkd->md", g, u))
+        _scatter_add(self.context, targets.reshape(-1), np.repeat(pairs, targets.shape[1]), g.reshape(-1), v)
+
+        return -float(_log_sigmoid(score[:, 0]).sum() + _log_sigmoid(-score[:, 1:]).sum())
+
+    def train_walks(self, walks, lr, rng, batch_size=BATCH_SIZE):
+        # Returns the summed loss and the number of pairs trained on
+        centers, contexts = self.pairs(walks, rng)
+        batch_size = min(batch_size, max(MIN_BATCH_SIZE, self.vectors.shape[0]))
+        order = rng.permutation(centers.size)
+        loss = 0.0
+        for start in range(0, order.size, batch_size):
+            batch = order[start:start + batch_size]
+            loss += self.update(centers[batch], contexts[batch], lr, rng)
+        return loss, centers.size
+
+    def save(self, path, ids=None):
+        write_embedding(path, self.vectors, ids)
+        return path
+
+
+def _train_chunk(model, walker, start_nodes, walk_length, seed_seq, task, chunk_size, num_tasks):
+    # Task t of num_tasks walks the start nodes of one chunk (its own random
+    # stream) and trains on them, the learning rate decaying linearly with t
+    epoch, chunk = task
+    index = epoch * -(-start_nodes.size // chunk_size) + chunk
+    lr = model.lr - (model.lr - model.min_lr) * index / num_tasks
+    rng = np.random.default_rng(np.random.SeedSequence(seed_seq.entropy, spawn_key=(epoch, chunk)))
+    walks = walker.walk(start_nodes[chunk * chunk_size:(chunk + 1) * chunk_size], walk_length, rng=rng)
+    loss, num_pairs = model.train_walks(walks, lr, rng)
+    return walks.shape[0], loss, num_pairs
+
+
+def _init_worker(model_spec, walker_spec, start_spec):
+    blocks = _worker.setdefault("blocks", [])
+    _worker["model"] = _attach(model_spec, blocks)
+    _worker["walker"] = _attach(walker_spec, blocks)
+    _worker["start_nodes"] = _from_shared(start_spec, blocks)
+
+
+def _run_chunk(args):
+    return _train_chunk(_worker["model"], _worker["walker"], _worker["start_nodes"], *args)
+
+
+def train(model, walker, start_nodes, walk_length, epochs=1, seed=None, workers=1, chunk_size=CHUNK_SIZE):
+    # Generate walks chunk by chunk and train on them straight away, without
+    # keeping a corpus. With several workers every process updates the same
+    # shared weight matrices without locks (Hogwild), so results then depend on
+    # scheduling; one worker is deterministic for a given seed
+    start_nodes = np.asarray(start_nodes, dtype=walker.graph.indices.dtype)
+    seed_seq = np.random.SeedSequence(seed)
+    num_chunks = -(-start_nodes.size // chunk_size)
+    tasks = [(epoch, chunk) for epoch in range(epochs) for chunk in range(num_chunks)]
+    args = [(walk_length, seed_seq, task, chunk_size, len(tasks)) for task in tasks]
+    workers = min(workers or os.cpu_count(), max(len(tasks), 1))
+
+    start = time.perf_counter()
+    if workers == 1:
+        results = [_train_chunk(model, walker, start_nodes, *a) for a in args]
+    else:
+        blocks, views = [], []
+        shared = None
+        try:
+            model_spec = _share(model, blocks)
+            walker_spec = _share(walker, blocks)
+            start_spec = _to_shared(start_nodes, blocks)
+            with Pool(workers, initializer=_init_worker, initargs=(model_spec, walker_spec, start_spec)) as pool:
+                results = list(pool.imap_unordered(_run_chunk, args))
+            # Copy the trained weights back out of shared memory
+            for key in ("vectors", "context"):
+                shared = _from_shared(model_spec[2][key], views)
+                getattr(model, key)[...] = shared
+        finally:
+            # The view has to go before the block backing it can be closed
+            del shared
+            for shm in views:
+                shm.close()
+            for shm in blocks:
+                shm.close()
+                shm.unlink()
+    seconds = time.perf_counter() - start
+
+    num_walks = sum(r[0] for r in results)
+    num_pairs = sum(r[2] for r in results)
+    return {
+        "walks": num_walks,
+        "seconds": seconds,
+        "walks_per_s": num_walks / seconds if seconds else float("inf"),
+        "loss": sum(r[1] for r in results) / max(num_pairs, 1),
+    }
@@ -0,0 +1,222 @@
+import json
+import os
+
+import numpy as np
+
+from csr_graph import CSRGraph
+from sampling import CounterRNG, alias_draw, alias_tables, randbelow
+
+# A sharded graph is a directory with meta.json, nodes.npy and, for every
+# shard i, the CSR arrays shard_<i>.<name>.npy of the contiguous node range
+# bounds[i]:bounds[i + 1]. indptr is local to the shard, indices hold global
+# node indices, and weighted graphs also store the alias tables of the shard
+VERSION = 1
+SHARD_BYTES = 256 * 2 ** 20
+# Walkers generated per ShardedWalker.iter_walks batch
+BATCH_SIZE = 2 ** 18
+# Shards holding walkers on fewer than this share of their nodes are read
+# through the memory map instead of loaded whole
+EAGER_FRACTION = 1 / 64
+
+
+def shard_bounds(indptr, edge_bytes, shard_bytes=SHARD_BYTES):
+    # Node bounds of contiguous shards of about shard_bytes each (8 bytes of
+    # indptr per node plus edge_bytes per edge), found by bisection so that a
+    # memory mapped indptr is never read in full
+    num_nodes = indptr.size - 1
+
+    def size(k):
+        return int(indptr[k]) * edge_bytes + 8 * k
+
+    bounds = [0]
+    while bounds[-1] < num_nodes:
+        target = size(bounds[-1]) + shard_bytes
+        lo, hi = bounds[-1] + 1, num_nodes
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if size(mid) <= target:
+                lo = mid
+            else:
+                hi = mid - 1
+        bounds.append(lo)
+    return np.array(bounds, dtype=np.int64)
+
+
+def write_sharded(path, graph, shard_bytes=SHARD_BYTES):
+    # graph may be memory mapped (CSRGraph.load), shards are copied one at a time
+    os.makedirs(path, exist_ok=True)
+    edge_bytes = 4 + (20 if graph.weighted else 0)
+    bounds = shard_bounds(graph.indptr, edge_bytes, shard_bytes)
+
+    for i in range(bounds.size - 1):
+        lo, hi = bounds[i], bounds[i + 1]
+        start, end = int(graph.indptr[lo]), int(graph.indptr[hi])
+        indptr = np.asarray(graph.indptr[lo:hi + 1], dtype=np.int64) - start
+        arrays = {"indptr": indptr, "indices": np.asarray(graph.indices[start:end], dtype=np.int32)}
+        if graph.weighted:
+            arrays["data"] = np.asarray(graph.data[start:end], dtype=np.float64)
+            arrays["prob"], arrays["alias"] = alias_tables(arrays["data"], indptr)
+        for name, arr in arrays.items():
+            np.save(os.path.join(path, f"shard_{i:05d}.{name}.npy"), arr)
+
+    np.save(os.path.join(path, "nodes.npy"), graph.nodes)
+    meta = {
+        "version": VERSION,
+        "num_nodes": graph.num_nodes,
+        "num_edges": graph.num_edges,
+        "weighted": graph.weighted,
+        "bounds": bounds.tolist(),
+    }
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump(meta, f)
+    return ShardedGraph(path)
+
+
+class Shard:
+    # CSR arrays of the nodes lo:hi, with global node indices
+    def __init__(self, lo, hi, indptr, indices, data=None, prob=None, alias=None):
+        self.lo = lo
+        self.hi = hi
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.prob = prob
+        self.alias = alias
+
+    @property
+    def num_nodes(self):
+        return self.hi - self.lo
+
+    @property
+    def nbytes(self):
+        return sum(arr.nbytes for arr in vars(self).values() if isinstance(arr, np.ndarray))
+
+
+class ShardedGraph:
+    def __init__(self, path):
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        if meta["version"] != VERSION:
+            raise ValueError(f"Unsupported sharded graph version {meta['version']}")
+
+        self.path = path
+        self.num_nodes = meta["num_nodes"]
+        self.num_edges = meta["num_edges"]
+        self.weighted = meta["weighted"]
+        self.bounds = np.array(meta["bounds"], dtype=np.int64)
+        self.nodes = np.load(os.path.join(path, "nodes.npy"), mmap_mode="r")
+
+    @property
+    def num_shards(self):
+        return self.bounds.size - 1
+
+    def shard_of(self, idx):
+        return np.searchsorted(self.bounds, idx, side="right") - 1
+
+    def shard(self, i, mmap=True):
+        # Memory mapped, or read from disk in one sequential pass with mmap=False
+        arrays = {}
+        for name in ("indptr", "indices", "data", "prob", "alias"):
+            file = os.path.join(self.path, f"shard_{i:05d}.{name}.npy")
+            if os.path.exists(file):
+                arrays[name] = np.load(file, mmap_mode="r" if mmap else None)
+        return Shard(int(self.bounds[i]), int(self.bounds[i + 1]), **arrays)
+
+    def to_csr(self):
+        # The whole graph in memory, for graphs that fit
+        shards = [self.shard(i, mmap=False) for i in range(self.num_shards)]
+        ends = np.cumsum([0] + [shard.indices.size for shard in shards])
+        indptr = np.concatenate([[0]] + [shard.indptr[1:] + end for shard, end in zip(shards, ends)])
+        indices = np.concatenate([shard.indices for shard in shards] or [np.zeros(0, np.int32)])
+        data = np.concatenate([shard.data for shard in shards] or [np.zeros(0)]) if self.weighted else None
+        return CSRGraph(indptr, indices, data=data, nodes=np.asarray(self.nodes))
+
+
+class ShardedWalker:
+    # First order random walks on a ShardedGraph, batch by batch. Walkers are
+    # bucketed by the shard they are in and each sweep visits the shards in
+    # order: the walkers of a shard take steps until they finish or leave it,
+    # then move to the bucket of their new shard (this sweep if it comes
+    # later, the next one otherwise), so a shard is read once per sweep
+    # rather than paged in at random. Draws come from the counter based
+    # stream of RandomWalker.counter_walk, which makes the walks independent
+    # of the schedule: they match RandomWalker(graph.to_csr()).counter_walk
+    def __init__(self, graph):
+        self.graph = graph
+        self.stats = {"sweeps": 0, "shard_reads": 0, "bytes_read": 0}
+
+    def walk(self, start_nodes, walk_length, seed=0, walk_index=0):
+        start_nodes = np.asarray(start_nodes, dtype=np.int32)
+        walks = np.empty((start_nodes.size, walk_length), dtype=start_nodes.dtype)
+        if walk_length == 0:
+            return walks
+        walks[:, 0] = start_nodes
+
+        keys = CounterRNG.for_walks(seed, start_nodes, walk_index).keys
+        # Column of walks each walker fills next
+        steps = np.ones(start_nodes.size, dtype=np.int64)
+        buckets = [[] for _ in range(self.graph.num_shards)]
+        if walk_length > 1:
+            self._bucket(buckets, np.arange(start_nodes.size), start_nodes)
+
+        while any(buckets):
+            self.stats["sweeps"] += 1
+            for i, bucket in enumerate(buckets):
+                if bucket:
+                    buckets[i] = []
+                    left = self._walk_shard(i, np.concatenate(bucket), walks, steps, keys)
+                    self._bucket(buckets, left, walks[left, steps[left] - 1])
+
+        return walks
+
+    def iter_walks(self, start_nodes, walk_length, batch_size=BATCH_SIZE, rng=None):
+        # Batches for walk_corpus.write_walks; rng is the integer seed of the
+        # counter stream and the k-th start node gets walk index k
+        seed = 0 if rng is None else int(rng)
+        start_nodes = np.asarray(start_nodes)
+        for i in range(0, start_nodes.size, batch_size):
+            rows = np.arange(i, min(i + batch_size, start_nodes.size))
+            yield self.walk(start_nodes[rows], walk_length, seed=seed, walk_index=rows)
+
+    def _bucket(self, buckets, walkers, cur):
+        shard_ids = self.graph.shard_of(cur)
+        order = np.argsort(shard_ids, kind="stable")
+        walkers, shard_ids = walkers[order], shard_ids[order]
+        splits = np.flatnonzero(np.diff(shard_ids)) + 1
+        for group, i in zip(np.split(walkers, splits), shard_ids[np.r_[0, splits]] if walkers.size else []):
+            buckets[i].append(group)
+
+    def _walk_shard(self, i, group, walks, steps, keys):
+        # Advance the walkers in group while they stay in shard i, returns the
+        # unfinished ones that left it
+        walk_length = walks.shape[1]
+        shard = self.graph.shard(i, mmap=group.size < EAGER_FRACTION * (self.graph.bounds[i + 1] - self.graph.bounds[i]))
+        if not isinstance(shard.indices, np.memmap):
+            self.stats["shard_reads"] += 1
+            self.stats["bytes_read"] += shard.nbytes
+
+        left = []
+        while group.size:
+            step = steps[group]
+            cur = walks[group, step - 1]
+            start = shard.indptr[cur - shard.lo]
+            degree = shard.indptr[cur - shard.lo + 1] - start
+
+            # Same draws as RandomWalker.walk; walkers at dead ends stay put
+            nxt = cur.copy()
+            moving = np.flatnonzero(degree > 0)
+            rng = CounterRNG(keys[group[moving]], {"step": step[moving], "slot": 0})
+            if self.graph.weighted:
+                offsets = alias_draw(shard.prob, shard.alias, start[moving], degree[moving], rng)
+            else:
+                offsets = randbelow(rng, degree[moving])
+            nxt[moving] = shard.indices[start[moving] + offsets]
+            walks[group, step] = nxt
+            steps[group] += 1
+
+            unfinished = step + 1 < walk_length
+            inside = (nxt >= shard.lo) & (nxt < shard.hi)
+            left.append(group[unfinished & ~inside])
+            group = group[unfinished & inside]
+
+        return np.concatenate(left) if left else np.zeros(0, dtype=np.int64)
@@ -0,0 +1,37 @@
+import numpy as np
+
+from csr_graph import CSRGraph
+
+# The 10 node graph the graph_walk.py scenes walk on
+NODES = list(range(10))
+EDGES = [
+    (0, 1),
+    (1, 2),
+    (1, 3),
+    (2, 3),
+    (3, 4),
+    (4, 5),
+    (4, 6),
+    (2, 7),
+    (7, 8),
+    (8, 9),
+]
+WEIGHTS = [1, 3, 1, 2, 1, 1, 2, 4, 1, 1]
+
+
+def toy_graph(weighted=False):
+    # Same adjacency order as toy_networkx, so walks drawn with rng=random match
+    src, dst = np.array(EDGES).T
+    return CSRGraph.from_edges(src, dst, weights=WEIGHTS if weighted else None, nodes=np.array(NODES))
+
+
+def toy_networkx(weighted=False):
+    import networkx as nx
+
+    nxg = nx.Graph()
+    nxg.add_nodes_from(NODES)
+    if weighted:
+        nxg.add_weighted_edges_from((u, v, w) for (u, v), w in zip(EDGES, WEIGHTS))
+    else:
+        nxg.add_edges_from(EDGES)
+    return nxg
@@ -0,0 +1,124 @@
+import numpy as np
+
+from node2vec import Node2VecWalker
+
+
+def transition_matrix(graph):
+    # First order P[u, v] = w(u, v) / sum_v' w(u, v') as a CSR matrix with the
+    # graph's own indptr/indices; dead ends get a self loop (walkers stay put)
+    import scipy.sparse as sp
+
+    n = graph.num_nodes
+    src = np.repeat(np.arange(n), graph.degree)
+    weights = graph.data if graph.weighted else np.ones(graph.num_edges)
+    out_weight = np.bincount(src, weights, minlength=n)
+
+    P = sp.csr_matrix((weights / out_weight[src], graph.indices, graph.indptr), shape=(n, n))
+    return P + sp.diags((graph.degree == 0).astype(np.float64), format="csr")
+
+
+def edge_transition_matrix(graph, p=1, q=1):
+    # node2vec is first order on edge states: from (x, u) it moves to (u, v)
+    # with probability proportional to alpha_{p,q}(x, v) w(u, v). States are
+    # the n nodes (walkers that have not moved yet, or are stuck at a dead
+    # end) followed by the m directed edges in CSR order. Returns the
+    # transition matrix and the n x (n + m) matrix summing states by node
+    import scipy.sparse as sp
+
+    n, m = graph.num_nodes, graph.num_edges
+    walker = Node2VecWalker(graph, p=p, q=q, mode="rejection")
+    degree = graph.degree
+
+    # Node states take a first order step onto an edge state, dead ends stay
+    tail = np.repeat(np.arange(n), degree)
+    head = np.asarray(graph.indices, dtype=np.int64)
+    weights = graph.data if graph.weighted else np.ones(m)
+    out_weight = np.bincount(tail, weights, minlength=n)
+    dead = np.flatnonzero(degree == 0)
+    rows = [dead, tail]
+    cols = [dead, n + np.arange(m)]
+    vals = [np.ones(dead.size), weights / out_weight[tail]]
+
+    # Edge state e = (x, u) moves to the edges (u, v), laid out like the
+    # node2vec alias tables of Node2VecWalker
+    size = degree[head]
+    edge_ptr = np.zeros(m + 1, dtype=np.int64)
+    np.cumsum(size, out=edge_ptr[1:])
+    nbr_pos = np.repeat(graph.indptr[head] - edge_ptr[:-1], size) + np.arange(edge_ptr[-1])
+    weights = walker.alpha(np.repeat(tail, size), graph.indices[nbr_pos])
+    if graph.weighted:
+        weights = weights * graph.data[nbr_pos]
+    edge_rows = np.repeat(np.arange(m), size)
+    total = np.bincount(edge_rows, weights, minlength=m)
+    rows += [n + edge_rows, n + np.flatnonzero(size == 0)]
+    cols += [n + nbr_pos, head[size == 0]]
+    vals += [weights / total[edge_rows], np.ones(np.count_nonzero(size == 0))]
+
+    M = sp.csr_matrix(
+        (np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+        shape=(n + m, n + m),
+    )
+    to_nodes = sp.hstack([sp.identity(n, format="csr"), sp.csr_matrix(
+        (np.ones(m), (head, np.arange(m))), shape=(n, m),
+    )]).tocsr()
+    return M, to_nodes
+
+
+class WalkChain:
+    # Exact distributions of the walkers of RandomWalker (p = q = 1) or
+    # Node2VecWalker, by sparse power iteration instead of simulation. All
+    # methods take a batch of start nodes and return one column per start
+    def __init__(self, graph, p=1, q=1):
+        # scipy is only imported once a chain is built, not with the module
+        import scipy.sparse as sp
+
+        self.graph = graph
+        if p == q == 1:
+            M = transition_matrix(graph)
+            self.to_nodes = sp.identity(graph.num_nodes, format="csr")
+        else:
+            M, self.to_nodes = edge_transition_matrix(graph, p=p, q=q)
+        # Distributions are columns, so a step is x <- M^T x
+        self.step_matrix = M.T.tocsr()
+
+    @property
+    def num_states(self):
+        return self.step_matrix.shape[0]
+
+    def start(self, start_nodes):
+        start_nodes = np.atleast_1d(start_nodes)
+        x = np.zeros((self.num_states, start_nodes.size))
+        x[start_nodes, np.arange(start_nodes.size)] = 1
+        return x
+
+    def k_step(self, start_nodes, k):
+        # P(walker is at v after k steps), (num_nodes, len(start_nodes))
+        x = self.start(start_nodes)
+        for _ in range(k):
+            x = self.step_matrix @ x
+        return self.to_nodes @ x
+
+    def visit_frequency(self, start_nodes, walk_length):
+        # Expected share of the walk_length positions of a walk (start node
+        # included, like RandomWalker.walk) spent at each node
+        x = self.start(start_nodes)
+        visits = self.to_nodes @ x
+        for _ in range(walk_length - 1):
+            x = self.step_matrix @ x
+            visits += self.to_nodes @ x
+        return visits / max(walk_length, 1)
+
+    def stationary(self, start_nodes=None, tol=1e-10, max_iter=10000):
+        # Long run distribution from the given start nodes (default: uniform),
+        # iterating the lazy chain (I + M) / 2, which has the same fixed points
+        # but also converges on periodic (e.g. bipartite) graphs
+        if start_nodes is None:
+            x = np.zeros((self.num_states, 1))
+            x[:self.graph.num_nodes] = 1 / self.graph.num_nodes
+        else:
+            x = self.start(start_nodes)
+        for _ in range(max_iter):
+            x, x_prev = 0.5 * (x + self.step_matrix @ x), x
+            if np.abs(x - x_prev).sum(0).max() < tol:
+                break
+        return self.to_nodes @ x
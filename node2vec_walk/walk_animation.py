@@ -0,0 +1,78 @@
+import numpy as np
+from manim import *
+
+
+def interpolate_walks(node_pos, walks, t):
+    # Positions of all walkers t steps into their walks, moving along a
+    # straight line between consecutive nodes
+    last = walks.shape[1] - 1
+    t = min(max(t, 0), last)
+    i = min(int(t), last - 1) if last > 0 else 0
+    alpha = t - i
+    start = node_pos[walks[:, i]]
+    if alpha == 0:
+        return start
+    return (1 - alpha) * start + alpha * node_pos[walks[:, i + 1]]
+
+
+class FollowWalks(Animation):
+    # Play back precomputed walks (node indices into node_pos) as a single
+    # animation. Each step takes step_time to move (eased with step_rate_func)
+    # plus hold_time at the node. reveal maps a step to the mobjects that fade
+    # in over fade_time once the walkers arrive there (e.g. walk history text)
+    def __init__(
+        self,
+        walkers,
+        node_pos,
+        walks,
+        step_time=0.8,
+        hold_time=0.0,
+        step_rate_func=smooth,
+        offsets=0,
+        reveal=None,
+        fade_time=0.0,
+        **kwargs,
+    ):
+        self.walkers = walkers
+        self.node_pos = np.asarray(node_pos, dtype=np.float64)
+        self.walks = np.asarray(walks)
+        self.num_steps = self.walks.shape[1] - 1
+        self.step_time = step_time
+        self.hold_time = hold_time
+        self.step_rate_func = step_rate_func
+        self.offsets = offsets
+        self.fade_time = fade_time
+
+        self.reveal = []
+        for step, mobs in sorted((reveal or {}).items()):
+            if step > self.num_steps:
+                continue
+            for mob in mobs:
+                mob.set_opacity(0)
+                self.reveal.append((step, mob))
+
+        kwargs.setdefault("run_time", max(self.num_steps * (step_time + hold_time), 1e-3))
+        kwargs.setdefault("rate_func", linear)
+        super().__init__(Group(walkers, *(mob for _, mob in self.reveal)), **kwargs)
+
+    def interpolate_mobject(self, alpha):
+        elapsed = alpha * self.num_steps * (self.step_time + self.hold_time)
+        step_duration = self.step_time + self.hold_time
+        step = min(int(elapsed // step_duration), self.num_steps) if step_duration else self.num_steps
+        moved = min((elapsed - step * step_duration) / self.step_time, 1) if self.step_time else 1
+        t = step + self.step_rate_func(moved) if step < self.num_steps else self.num_steps
+
+        positions = interpolate_walks(self.node_pos, self.walks, t) + self.offsets
+        if hasattr(self.walkers, "set_positions"):
+            self.walkers.set_positions(positions)
+        else:
+            for walker, pos in zip(self.walkers, positions):
+                walker.move_to(pos)
+
+        for step, mob in self.reveal:
+            arrival = step * step_duration - self.hold_time
+            shown = elapsed - arrival
+            if shown < 0:
+                mob.set_opacity(0)
+            else:
+                mob.set_opacity(min(shown / self.fade_time, 1) if self.fade_time else 1)
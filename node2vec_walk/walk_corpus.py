@@ -0,0 +1,128 @@
+import struct
+
+import numpy as np
+
+# Fixed size little endian header followed by the (num_walks, walk_length)
+# node index matrix in row major order:
+# magic, version, dtype, walk_length, num_walks, num_nodes, padding to 64 bytes
+MAGIC = b"N2VWALKS"
+VERSION = 1
+HEADER = struct.Struct("<8sI4sIQQ28x")
+
+
+def corpus_dtype(num_nodes):
+    return np.dtype("<u2" if num_nodes <= np.iinfo(np.uint16).max + 1 else "<u4")
+
+
+def write_corpus(path, walk_batches, num_nodes):
+    # Stream (batch_size, walk_length) arrays to disk; the walk count is only
+    # known at the end, so the header is written again once all batches are in
+    dtype = corpus_dtype(num_nodes)
+    walk_length = None
+    num_walks = 0
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, dtype.str.encode(), 0, 0, num_nodes))
+        for walks in walk_batches:
+            if walk_length is None:
+                walk_length = walks.shape[1]
+            elif walks.shape[1] != walk_length:
+                raise ValueError(f"Walk length changed from {walk_length} to {walks.shape[1]}")
+            f.write(np.ascontiguousarray(walks, dtype=dtype).tobytes())
+            num_walks += walks.shape[0]
+
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, dtype.str.encode(), walk_length or 0, num_walks, num_nodes))
+
+    return num_walks
+
+
+def write_walks(path, walker, start_nodes, walk_length, batch_size=8192, rng=None):
+    batches = walker.iter_walks(start_nodes, walk_length, batch_size=batch_size, rng=rng)
+    return write_corpus(path, batches, walker.graph.num_nodes)
+
+
+class WalkCorpus:
+    # Memory mapped walk corpus; iterating over it yields each walk as a list
+    # of string tokens (gensim Word2Vec sentences) and can be restarted
+    def __init__(self, path, nodes=None, batch_size=8192):
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise ValueError(f"{path} is too short to be a walk corpus")
+
+        magic, version, dtype, walk_length, num_walks, num_nodes = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a walk corpus")
+        if version != VERSION:
+            raise ValueError(f"Unsupported walk corpus version {version}")
+
+        self.path = path
+        self.num_nodes = num_nodes
+        self.nodes = None if nodes is None else np.asarray(nodes)
+        self.batch_size = batch_size
+        dtype = np.dtype(dtype.rstrip(b"\0").decode())
+        if num_walks:
+            self.walks = np.memmap(
+                path,
+                dtype=dtype,
+                mode="r",
+                offset=HEADER.size,
+                shape=(num_walks, walk_length),
+            )
+        else:
+            self.walks = np.empty((0, walk_length), dtype=dtype)
+
+    def __len__(self):
+        return self.walks.shape[0]
+
+    def __iter__(self):
+        for i in range(0, len(self), self.batch_size):
+            walks = np.asarray(self.walks[i:i + self.batch_size])
+            if self.nodes is not None:
+                walks = self.nodes[walks]
+            for walk in walks.astype(str).tolist():
+                yield walk
+
+
+class LazyWalks:
+    # walks_per_node walks of every start node, generated on demand from the
+    # counter based stream of RandomWalker.counter_walk instead of stored. Walk
+    # k is walk k // n of start node k % n and can be regenerated on its own,
+    # e.g. to inspect one walk or resume an interrupted run at any walk
+    def __init__(self, walker, start_nodes, walk_length, walks_per_node=1, seed=0, nodes=None, batch_size=8192):
+        self.walker = walker
+        self.start_nodes = np.asarray(start_nodes)
+        self.walk_length = walk_length
+        self.walks_per_node = walks_per_node
+        self.seed = seed
+        self.nodes = None if nodes is None else np.asarray(nodes)
+        self.batch_size = batch_size
+
+    def __len__(self):
+        return self.start_nodes.size * self.walks_per_node
+
+    def walks(self, start=0, stop=None):
+        # Node index matrix of walks start to stop, built in one piece; use
+        # batches to go through many walks
+        k = np.arange(start, len(self) if stop is None else min(stop, len(self)))
+        n = self.start_nodes.size
+        return self.walker.counter_walk(self.start_nodes[k % n], self.walk_length, self.seed, k // n)
+
+    def __getitem__(self, k):
+        if not -len(self) <= k < len(self):
+            raise IndexError(f"walk {k} out of range for {len(self)} walks")
+        return self.walks(k % len(self), k % len(self) + 1)[0]
+
+    def batches(self, start=0):
+        # Node index matrices of batch_size walks from walk start on, e.g. to
+        # resume an interrupted run
+        for i in range(start, len(self), self.batch_size):
+            yield self.walks(i, i + self.batch_size)
+
+    def __iter__(self):
+        for walks in self.batches():
+            if self.nodes is not None:
+                walks = self.nodes[walks]
+            for walk in walks.astype(str).tolist():
+                yield walk
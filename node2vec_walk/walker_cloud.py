@@ -0,0 +1,23 @@
+import numpy as np
+from manim import *
+
+
+class WalkerCloud(PMobject):
+    # All walkers as a single point cloud; set_positions replaces the whole
+    # (n_walkers, 3) point array at once, so a frame costs the same whether
+    # there are 5 or 5,000 walkers
+    def __init__(self, positions, colors=BLUE, stroke_width=6, opacity=0.8, rgbas=None, **kwargs):
+        super().__init__(stroke_width=stroke_width, **kwargs)
+        positions = np.asarray(positions, dtype=np.float64)
+        # rgbas, an (n_walkers, 4) array, skips the per point color conversion
+        if rgbas is not None:
+            rgbas = np.asarray(rgbas, dtype=np.float64)
+        elif isinstance(colors, (list, tuple, np.ndarray)):
+            rgbas = np.array([color_to_rgba(color, opacity) for color in colors])
+        else:
+            rgbas = np.tile(color_to_rgba(colors, opacity), (len(positions), 1))
+        self.add_points(positions, rgbas=rgbas)
+
+    def set_positions(self, positions):
+        self.points = np.asarray(positions, dtype=np.float64)
+        return self
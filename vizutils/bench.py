@@ -0,0 +1,265 @@
+import argparse
+import importlib.util
+import inspect
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from vizutils.profiling import counted, patched, timed
+from vizutils.render import ROOT, SCENE_FILES, find_scenes
+
+HISTORY_FILE = os.path.join(ROOT, "bench_history.jsonl")
+# Relative slowdown (or growth, for memory and LaTeX compiles) that counts as
+# a regression when comparing against a baseline
+THRESHOLD = 0.2
+
+
+def run_scene(path, name):
+    # Build and render one scene at low quality without writing a movie, with
+    # the module's TEST fast path on. Runs in its own process (see bench_scene)
+    # so that peak RSS is the scene's own
+    import manim
+    from manim import Scene, tempconfig
+    from manim.utils import tex_file_writing
+
+    scene_dir = os.path.dirname(os.path.abspath(path))
+    os.chdir(scene_dir)
+    sys.path.insert(0, scene_dir)
+    spec = importlib.util.spec_from_file_location(os.path.splitext(os.path.basename(path))[0], path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    if hasattr(module, "TEST"):
+        module.TEST = True
+
+    play_times, wait_times, counts = [], [], {}
+    tex_module = inspect.getmodule(manim.SingleStringMathTex)
+
+    with tempfile.TemporaryDirectory() as media_dir, tempconfig({
+        "quality": "low_quality",
+        "media_dir": media_dir,
+        "write_to_movie": False,
+        "save_last_frame": False,
+        "disable_caching": True,
+        "verbosity": "ERROR",
+        "progress_bar": "none",
+    }), patched(Scene, "play", timed(play_times)), \
+            patched(Scene, "wait", timed(wait_times)), \
+            patched(tex_module, "tex_to_svg_file", counted(counts, "tex")), \
+            patched(tex_file_writing, "compile_tex", counted(counts, "latex")):
+        start = time.perf_counter()
+        scene = getattr(module, name)()
+        scene.render()
+        wall = time.perf_counter() - start
+
+    # LaTeX runs of the pre-warm pool happen in other processes
+    prewarm = sys.modules.get("vizutils.tex_prewarm")
+    counts["latex"] = counts.get("latex", 0) + (prewarm.stats["compiles"] if prewarm else 0)
+
+    return {
+        "wall_time": wall,
+        "num_plays": len(play_times),
+        "time_per_play": sum(play_times) / len(play_times) if play_times else 0.0,
+        "wait_time": sum(wait_times),
+        "tex_mobjects": counts.get("tex", 0),
+        "latex_compiles": counts.get("latex", 0),
+        "num_mobjects": len(scene.mobjects),
+        "num_family_mobjects": len(scene.get_mobject_family_members()),
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def bench_scene(scene):
+    cmd = [sys.executable, "-m", "vizutils.bench", "--run-scene", scene.path, scene.name]
+    proc = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode:
+        return {"error": proc.stderr[-2000:]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def random_csr(num_nodes, avg_degree, seed=0):
+    # indptr/indices of an undirected G(n, m) style graph, without networkx
+    rng = np.random.default_rng(seed)
+    m = num_nodes * avg_degree // 2
+    src, dst = rng.integers(0, num_nodes, (2, m))
+    src, dst = np.concatenate((src, dst)), np.concatenate((dst, src))
+    order = np.argsort(src, kind="stable")
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=num_nodes), out=indptr[1:])
+    return indptr, dst[order]
+
+
+def bench_walk(sizes=(10 ** 3, 10 ** 4, 10 ** 5), walk_length=20, repeat=3):
+    sys.path.insert(0, os.path.join(ROOT, "node2vec_walk"))
+    from csr_graph import CSRGraph
+    from random_walk import RandomWalker
+
+    results = {}
+    for num_nodes in sizes:
+        walker = RandomWalker(CSRGraph(*random_csr(num_nodes, 10)))
+        start_nodes = np.arange(num_nodes)
+        best = min(
+            _time(walker.walk, start_nodes, walk_length, rng=0)
+            for _ in range(repeat)
+        )
+        results[f"walk_steps_per_s/n={num_nodes}"] = num_nodes * (walk_length - 1) / best
+    return results
+
+
+def bench_sharded(num_nodes=10 ** 5, num_shards=16, walk_length=20, repeat=3):
+    # Walks on the on-disk sharded store, for comparison with bench_walk
+    sys.path.insert(0, os.path.join(ROOT, "node2vec_walk"))
+    from csr_graph import CSRGraph
+    from sharded_graph import ShardedWalker, write_sharded
+
+    graph = CSRGraph(*random_csr(num_nodes, 10))
+    with tempfile.TemporaryDirectory() as path:
+        shard_bytes = (graph.indptr.nbytes + graph.indices.nbytes) // num_shards
+        walker = ShardedWalker(write_sharded(path, graph, shard_bytes=shard_bytes))
+        start_nodes = np.arange(num_nodes)
+        best = min(_time(walker.walk, start_nodes, walk_length) for _ in range(repeat))
+    return {f"sharded_walk_steps_per_s/n={num_nodes}": num_nodes * (walk_length - 1) / best}
+
+
+def bench_sgns(num_nodes=2000, walk_length=40, dim=64, repeat=1):
+    # Walk generation plus skip-gram training, in walks per second
+    sys.path.insert(0, os.path.join(ROOT, "node2vec_walk"))
+    from csr_graph import CSRGraph
+    from random_walk import RandomWalker
+    from sgns import SkipGram, train
+
+    graph = CSRGraph(*random_csr(num_nodes, 10))
+    walker = RandomWalker(graph)
+    best = 0
+    for _ in range(repeat):
+        model = SkipGram(num_nodes, dim=dim, window=5, seed=0).set_noise(graph.degree)
+        best = max(best, train(model, walker, np.arange(num_nodes), walk_length, seed=0)["walks_per_s"])
+    return {f"sgns_walks_per_s/n={num_nodes}": best}
+
+
+def bench_nll(sizes=(10 ** 3, 10 ** 5, 10 ** 6), num_classes=10, repeat=3):
+    # The chunked NLL kernel behind MultiCase, in float64 and float32
+    sys.path.insert(0, os.path.join(ROOT, "nllloss"))
+    from nll import nll_loss
+
+    results = {}
+    rng = np.random.default_rng(0)
+    for n in sizes:
+        z = rng.normal(0, 1, (n, num_classes))
+        y_true = rng.integers(0, num_classes, n)
+        for dtype in (np.float64, np.float32):
+            zd = z.astype(dtype)
+            best = min(_time(nll_loss, zd, y_true, reduction="sum") for _ in range(repeat))
+            results[f"nll_rows_per_s/{np.dtype(dtype).name}/n={n}"] = n / best
+    return results
+
+
+# Modules walk generation workers import, which must not pull in the rendering stack
+CORE_MODULES = ("csr_graph", "random_walk", "node2vec", "transition", "toy_graph", "walk_corpus", "nll", "nll_stream")
+HEAVY_MODULES = ("manim", "networkx", "scipy", "cairo")
+
+
+def bench_import(repeat=5):
+    # Import time of the headless core in a fresh interpreter, numpy excluded
+    code = (
+        "import json, sys, time\n"
+        "import numpy\n"
+        f"sys.path[:0] = {[os.path.join(ROOT, 'node2vec_walk'), os.path.join(ROOT, 'nllloss')]!r}\n"
+        "start = time.perf_counter()\n"
+        f"for name in {CORE_MODULES!r}: __import__(name)\n"
+        "print(json.dumps([time.perf_counter() - start, sorted(set(m.split('.')[0] for m in sys.modules))]))\n"
+    )
+    best = None
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        elapsed, modules = json.loads(proc.stdout)
+        best = elapsed if best is None else min(best, elapsed)
+    heavy = [name for name in HEAVY_MODULES if name in modules]
+    if heavy:
+        print(f"core import pulls in {', '.join(heavy)}", file=sys.stderr)
+    return {"core_imports_per_s": 1 / best}
+
+
+def _time(func, *args, **kwargs):
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def git_commit():
+    proc = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+    return proc.stdout.strip() or None
+
+
+def compare(run, baseline, threshold=THRESHOLD):
+    # Regressions of run against baseline: more time, memory or LaTeX
+    # compiles per scene, fewer items per second in the micro benchmarks
+    regressions = []
+    for name, metrics in run.get("scenes", {}).items():
+        base = baseline.get("scenes", {}).get(name)
+        if not base or "error" in base or "error" in metrics:
+            continue
+        for key in ("wall_time", "time_per_play", "peak_rss_kb", "latex_compiles"):
+            if base.get(key) and metrics[key] > base[key] * (1 + threshold):
+                regressions.append(f"{name}.{key}: {base[key]:.4g} -> {metrics[key]:.4g}")
+    for key, value in run.get("micro", {}).items():
+        base = baseline.get("micro", {}).get(key)
+        if base and value < base / (1 + threshold):
+            regressions.append(f"{key}: {base:.4g} -> {value:.4g}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark scene builds and the walk/NLL kernels")
+    parser.add_argument("scenes", nargs="*", help="scene names to benchmark (default: all)")
+    parser.add_argument("--no-scenes", action="store_true", help="skip the scene benchmarks")
+    parser.add_argument("--no-micro", action="store_true", help="skip the micro benchmarks")
+    parser.add_argument("--history", default=HISTORY_FILE, help="JSON lines file results are appended to")
+    parser.add_argument("--save-baseline", metavar="FILE", help="also write this run to FILE")
+    parser.add_argument("--compare", metavar="FILE", help="flag regressions against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="relative change counted as regression")
+    parser.add_argument("--run-scene", nargs=2, metavar=("PATH", "SCENE"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_scene:
+        print(json.dumps(run_scene(*args.run_scene)))
+        return 0
+
+    run = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": git_commit(), "scenes": {}, "micro": {}}
+    if not args.no_scenes:
+        for file in SCENE_FILES:
+            for scene in find_scenes(os.path.join(ROOT, file), quality="l"):
+                if not args.scenes or scene.name in args.scenes:
+                    run["scenes"][scene.name] = result = bench_scene(scene)
+                    print(scene.name, json.dumps(result))
+    if not args.no_micro:
+        run["micro"].update(bench_walk())
+        run["micro"].update(bench_nll())
+        run["micro"].update(bench_sgns())
+        run["micro"].update(bench_sharded())
+        run["micro"].update(bench_import())
+        for key, value in run["micro"].items():
+            print(f"{key}: {value:,.0f}")
+
+    with open(args.history, "a") as f:
+        f.write(json.dumps(run) + "\n")
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(run, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(run, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+import argparse
+import glob
+import os
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from vizutils.render import ROOT, SCENE_FILES
+
+FFMPEG = os.environ.get("FFMPEG", "ffmpeg")
+FFPROBE = os.environ.get("FFPROBE", "ffprobe")
+FORMATS = ("gif", "webm")
+# Smallest settings the size budget shrinks an export to
+MIN_FPS = 6
+MIN_WIDTH = 240
+
+
+def out_file(movie, fmt):
+    # <dir>/mov/<Scene>.mov -> <dir>/<fmt>/<Scene>.<fmt>
+    scene_dir = os.path.dirname(os.path.dirname(os.path.abspath(movie)))
+    name = os.path.splitext(os.path.basename(movie))[0]
+    return os.path.join(scene_dir, fmt, f"{name}.{fmt}")
+
+
+def is_current(movie, fmt):
+    out = out_file(movie, fmt)
+    return os.path.exists(out) and os.path.getmtime(out) >= os.path.getmtime(movie)
+
+
+def _ffmpeg(*args):
+    # One thread per ffmpeg, the driver runs one export per core instead
+    cmd = [FFMPEG, "-hide_banner", "-loglevel", "error", "-y", "-threads", "1", *args]
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode:
+        raise RuntimeError(f"ffmpeg failed on {args[1]}:\n{proc.stderr[-2000:]}")
+
+
+def _filters(fps, width):
+    # Resample, scale, then drop frames that barely differ from the previous
+    # one (self.wait holds); with -vsync vfr the kept frames keep their
+    # timestamps, so a hold becomes one long frame instead of many copies
+    scale = f",scale={width}:-2:flags=lanczos" if width else ""
+    return f"fps={fps}{scale},mpdecimate"
+
+
+def encode(movie, out, fmt="gif", fps=15, width=None):
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    filters = _filters(fps, width)
+    if fmt == "gif":
+        # One palette for the whole scene, from the frames that remain
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            palette = os.path.join(tmp_dir, "palette.png")
+            _ffmpeg("-i", movie, "-vf", f"{filters},palettegen=stats_mode=diff", palette)
+            _ffmpeg(
+                "-i", movie, "-i", palette,
+                "-lavfi", f"{filters} [x]; [x][1:v] paletteuse=dither=bayer:bayer_scale=5:diff_mode=rectangle",
+                "-vsync", "vfr",
+                out,
+            )
+    elif fmt == "webm":
+        _ffmpeg(
+            "-i", movie,
+            "-vf", filters,
+            "-vsync", "vfr",
+            "-c:v", "libvpx-vp9", "-b:v", "0", "-crf", "35", "-row-mt", "1",
+            "-an",
+            out,
+        )
+    else:
+        raise ValueError(f"Unknown format {fmt!r}, expected one of {FORMATS}")
+    return out
+
+
+def _movie_width(movie):
+    proc = subprocess.run(
+        [FFPROBE, "-v", "error", "-select_streams", "v:0", "-show_entries", "stream=width", "-of", "csv=p=0", movie],
+        capture_output=True,
+        text=True,
+    )
+    try:
+        return int(proc.stdout.strip())
+    except ValueError:
+        return None
+
+
+def export(movie, fmt="gif", fps=15, width=None, max_bytes=None):
+    # Encode movie to <dir>/<fmt>; with a byte budget, shrink the frame size
+    # (down to MIN_WIDTH) and then the frame rate (down to MIN_FPS) until the
+    # output fits, sizes scaling roughly with the pixel count and fps
+    out = out_file(movie, fmt)
+    encode(movie, out, fmt, fps, width)
+    while max_bytes and os.path.getsize(out) > max_bytes:
+        ratio = max_bytes / os.path.getsize(out) * 0.9
+        width = width or _movie_width(movie)
+        if width and width > MIN_WIDTH:
+            width = max(MIN_WIDTH, int(width * ratio ** 0.5) // 2 * 2)
+        elif fps > MIN_FPS:
+            fps = max(MIN_FPS, int(fps * ratio))
+        else:
+            print(f"{out} is {os.path.getsize(out):,} bytes, over the {max_bytes:,} byte budget", file=sys.stderr)
+            break
+        encode(movie, out, fmt, fps, width)
+    return out
+
+
+def find_movies():
+    return sorted(
+        movie
+        for file in SCENE_FILES
+        for movie in glob.glob(os.path.join(ROOT, os.path.dirname(file), "mov", "*.mov"))
+    )
+
+
+def export_all(movies, formats=("gif",), jobs=None, force=False, **options):
+    # Every (movie, format) pair is an independent ffmpeg pipeline, run jobs
+    # at a time; returns the number of failed exports
+    todo = [(movie, fmt) for movie in movies for fmt in formats if force or not is_current(movie, fmt)]
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, jobs or os.cpu_count())) as pool:
+        futures = {pool.submit(export, movie, fmt, **options): (movie, fmt) for movie, fmt in todo}
+        for future in as_completed(futures):
+            try:
+                out = future.result()
+            except RuntimeError as e:
+                failed += 1
+                print(e, file=sys.stderr)
+            else:
+                print(f"export {os.path.relpath(out, ROOT)} ({os.path.getsize(out):,} bytes)")
+    return failed
+
+
+def add_arguments(parser):
+    parser.add_argument("--fps", type=int, default=15, help="export frame rate")
+    parser.add_argument("--width", type=int, help="export width in pixels (default: the movie's)")
+    parser.add_argument("--max-size", type=float, help="size budget per export in MB")
+
+
+def export_options(args):
+    return {
+        "fps": args.fps,
+        "width": args.width,
+        "max_bytes": int(args.max_size * 2 ** 20) if args.max_size else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export rendered scene movies as GIF/WebM")
+    parser.add_argument("movies", nargs="*", help="movies to export (default: every <dir>/mov/*.mov)")
+    parser.add_argument("--format", action="append", choices=FORMATS, help="output format, repeatable (default: gif)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="parallel exports")
+    parser.add_argument("-f", "--force", action="store_true", help="export even if up to date")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    movies = args.movies or find_movies()
+    return 1 if export_all(movies, args.format or ("gif",), args.jobs, args.force, **export_options(args)) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+# Profiling is opt-in per render, e.g. VIZ_PROFILE=1 manim -ql graph_walk.py ...
+PROFILE = os.environ.get("VIZ_PROFILE", "") not in ("", "0")
+PROFILE_DIR = os.environ.get("VIZ_PROFILE_DIR", "profiles")
+# Mobjects whose construction is worth timing (LaTeX, Pango, layout work)
+PROFILED_MOBJECTS = ("MathTex", "Tex", "Text", "MarkupText", "Matrix", "Graph", "SVGMobject")
+
+
+@contextmanager
+def patched(obj, name, wrapper):
+    # Temporarily replace obj.name by wrapper(obj.name); attributes that were
+    # only inherited are deleted again rather than pinned on obj
+    own = name in vars(obj) if isinstance(obj, type) else True
+    original = getattr(obj, name)
+    setattr(obj, name, wrapper(original))
+    try:
+        yield
+    finally:
+        if own:
+            setattr(obj, name, original)
+        else:
+            delattr(obj, name)
+
+
+def timed(log):
+    def wrapper(func):
+        def timed_func(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                log.append(time.perf_counter() - start)
+        return timed_func
+    return wrapper
+
+
+def counted(counter, key):
+    def wrapper(func):
+        def counted_func(*args, **kwargs):
+            counter[key] = counter.get(key, 0) + 1
+            return func(*args, **kwargs)
+        return counted_func
+    return wrapper
+
+
+class SceneProfiler:
+    # Records play/wait/add calls and mobject construction of one scene as
+    # Chrome trace events (chrome://tracing, Perfetto, speedscope)
+    def __init__(self, scene):
+        self.scene = scene
+        self.events = []
+        self.counts = {}
+        self.frames = 0
+        self._patches = []
+        self._start = None
+
+    def _now_us(self):
+        return (time.perf_counter() - self._start) * 1e6
+
+    def _traced(self, name, cat, frames=False):
+        def wrapper(func):
+            def traced_func(*args, **kwargs):
+                start, start_frames = self._now_us(), self.frames
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    event = {
+                        "name": name,
+                        "cat": cat,
+                        "ph": "X",
+                        "ts": start,
+                        "dur": self._now_us() - start,
+                        "pid": 0,
+                        "tid": 0,
+                    }
+                    if frames:
+                        event["args"] = {"frames": self.frames - start_frames}
+                    self.events.append(event)
+            return traced_func
+        return wrapper
+
+    def _count_frames(self, func):
+        def add_frame(frame, num_frames=1, *args, **kwargs):
+            self.frames += num_frames
+            return func(frame, num_frames, *args, **kwargs)
+        return add_frame
+
+    def _patch(self, obj, name, wrapper):
+        ctx = patched(obj, name, wrapper)
+        ctx.__enter__()
+        self._patches.append(ctx)
+
+    def start(self):
+        import manim
+        from manim.utils import tex_file_writing
+
+        from vizutils.tex_cache import tex_cache
+
+        self._start = time.perf_counter()
+        self._tex_stats = (tex_cache.hits, tex_cache.disk_hits, tex_cache.misses)
+        self._prewarm_compiles = self._prewarm_stats()
+
+        # Instance attributes shadow the Scene methods for this scene only
+        for name in ("play", "wait", "add"):
+            setattr(self.scene, name, self._traced(name, "scene", frames=True)(getattr(self.scene, name)))
+        self.scene.renderer.add_frame = self._count_frames(self.scene.renderer.add_frame)
+
+        for name in PROFILED_MOBJECTS:
+            cls = getattr(manim, name, None)
+            if cls is not None:
+                self._patch(cls, "__init__", self._traced(name, "mobject"))
+        self._patch(tex_file_writing, "compile_tex", counted(self.counts, "latex_compiles"))
+        return self
+
+    @staticmethod
+    def _prewarm_stats():
+        # Compiles of the pre-warm pool, which runs LaTeX in other processes
+        prewarm = sys.modules.get("vizutils.tex_prewarm")
+        return prewarm.stats["compiles"] if prewarm else 0
+
+    def stop(self):
+        from vizutils.tex_cache import tex_cache
+
+        while self._patches:
+            self._patches.pop().__exit__(None, None, None)
+        for name in ("play", "wait", "add"):
+            vars(self.scene).pop(name, None)
+        vars(self.scene.renderer).pop("add_frame", None)
+
+        hits, disk_hits, misses = (
+            now - before
+            for now, before in zip((tex_cache.hits, tex_cache.disk_hits, tex_cache.misses), self._tex_stats)
+        )
+        # Pre-warmed entries are found in the cache later but were compiled
+        # for this render, so they count as misses
+        prewarmed = self._prewarm_stats() - self._prewarm_compiles
+        hits = max(0, hits - prewarmed)
+        misses += prewarmed
+        lookups = hits + disk_hits + misses
+        self.summary = {
+            "scene": type(self.scene).__name__,
+            "wall_time_s": self._now_us() / 1e6,
+            "frames": self.frames,
+            "latex_compiles": self.counts.get("latex_compiles", 0) + prewarmed,
+            "tex_prewarm_compiles": prewarmed,
+            "tex_cache_hits": hits,
+            "tex_cache_disk_hits": disk_hits,
+            "tex_cache_misses": misses,
+            "tex_cache_hit_rate": (hits + disk_hits) / lookups if lookups else None,
+            "time_by_call_s": self._totals(),
+        }
+        return self
+
+    def _totals(self):
+        totals = {}
+        for event in self.events:
+            totals[event["name"]] = totals.get(event["name"], 0) + event["dur"] / 1e6
+        return totals
+
+    def write(self, path=None):
+        path = path or os.path.join(PROFILE_DIR, f"{self.summary['scene']}.trace.json")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.events, "otherData": self.summary}, f)
+        return path
+
+
+class ProfiledScene:
+    # Scene mixin, e.g. class MyScene(ProfiledScene, Scene). Nothing is wrapped
+    # unless profiling is on (VIZ_PROFILE=1 or profile = True on the class),
+    # so leaving the mixin in costs nothing in normal renders
+    profile = PROFILE
+
+    def setup(self):
+        super().setup()
+        self._profiler = SceneProfiler(self).start() if self.profile else None
+
+    def tear_down(self):
+        if self._profiler is not None:
+            path = self._profiler.stop().write()
+            print(f"Profile of {type(self).__name__} written to {path}")
+        super().tear_down()
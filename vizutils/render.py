@@ -0,0 +1,230 @@
+import argparse
+import ast
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from importlib import metadata
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENE_FILES = (
+    "nllloss/nllloss.py",
+    "node2vec_walk/graph_walk.py",
+    "node2vec_walk/embedding_scatter.py",
+)
+HASH_FILE = ".render_hashes.json"
+
+
+class SceneInfo:
+    def __init__(self, path, name, digest):
+        self.path = path
+        self.name = name
+        self.digest = digest
+
+    @property
+    def out_dir(self):
+        return os.path.join(os.path.dirname(self.path), "mov")
+
+    @property
+    def out_file(self):
+        return os.path.join(self.out_dir, f"{self.name}.mov")
+
+
+def _local_sources(path, tree, seen=None):
+    # Sources of the sibling and vizutils modules the scene file imports,
+    # followed recursively
+    seen = set() if seen is None else seen
+    scene_dir = os.path.dirname(path)
+    sources = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom) and node.module:
+            names = [node.module]
+        elif isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        else:
+            continue
+        for name in names:
+            for base in (scene_dir, ROOT):
+                file = os.path.join(base, *name.split(".")) + ".py"
+                if file in seen or not os.path.exists(file):
+                    continue
+                seen.add(file)
+                with open(file, "rb") as f:
+                    source = f.read()
+                sources.append(source)
+                sources += _local_sources(file, ast.parse(source), seen)
+    return sources
+
+
+def _input_stats(path, tree):
+    # Module level string constants naming existing files (e.g. EDGELIST),
+    # relative paths being relative to the scene file like when rendering
+    stats = []
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and isinstance(node.value, ast.Constant):
+            value = node.value.value
+            if not isinstance(value, str):
+                continue
+            file = os.path.join(os.path.dirname(path), value)
+            if os.path.isfile(file):
+                stat = os.stat(file)
+                stats.append((value, stat.st_size, stat.st_mtime_ns))
+    return stats
+
+
+def find_scenes(path, quality="h"):
+    # Scene subclasses with a construct method (own or inherited), each hashed
+    # over its class chain, the module level code (constants, helpers), the
+    # local modules it imports, its input files and the render settings
+    with open(path) as f:
+        source = f.read()
+    tree = ast.parse(source)
+
+    classes = {node.name: node for node in tree.body if isinstance(node, ast.ClassDef)}
+    module_code = [
+        ast.get_source_segment(source, node)
+        for node in tree.body
+        if not isinstance(node, ast.ClassDef)
+    ]
+    try:
+        manim_version = metadata.version("manim")
+    except metadata.PackageNotFoundError:
+        manim_version = None
+    shared = [repr(module_code), repr(_input_stats(path, tree)), manim_version, quality]
+    shared += [src.decode(errors="replace") for src in _local_sources(path, tree)]
+
+    def chain(name):
+        node = classes.get(name)
+        if node is None:
+            return [name]
+        bases = [base.id for base in node.bases if isinstance(base, ast.Name)]
+        return [name] + [c for base in bases for c in chain(base)]
+
+    def has_construct(name):
+        return any(
+            isinstance(item, ast.FunctionDef) and item.name == "construct"
+            for c in chain(name) if c in classes
+            for item in classes[c].body
+        )
+
+    scenes = []
+    for name in classes:
+        names = chain(name)
+        if "Scene" not in names or not has_construct(name):
+            continue
+        h = hashlib.sha256()
+        for part in shared + [ast.get_source_segment(source, classes[c]) for c in names if c in classes]:
+            h.update(repr(part).encode())
+        scenes.append(SceneInfo(path, name, h.hexdigest()))
+
+    return scenes
+
+
+def load_hashes(out_dir):
+    try:
+        with open(os.path.join(out_dir, HASH_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_hash(scene):
+    # Re-read so hashes written by a concurrent driver run are kept
+    hashes = load_hashes(scene.out_dir)
+    hashes[scene.name] = scene.digest
+    tmp_file = os.path.join(scene.out_dir, f"{HASH_FILE}.{scene.name}.tmp")
+    with open(tmp_file, "w") as f:
+        json.dump(hashes, f, indent=2, sort_keys=True)
+    os.replace(tmp_file, os.path.join(scene.out_dir, HASH_FILE))
+
+
+def is_current(scene):
+    return os.path.exists(scene.out_file) and load_hashes(scene.out_dir).get(scene.name) == scene.digest
+
+
+def render(scene, quality="h", prewarm_workers=None):
+    with tempfile.TemporaryDirectory() as media_dir:
+        cmd = [
+            sys.executable, "-m", "manim", "render",
+            "-q", quality,
+            "--format", "mov",
+            "--media_dir", media_dir,
+            os.path.basename(scene.path),
+            scene.name,
+        ]
+        # Keep the tex cache (and pre-warm manifests) across renders
+        env = dict(os.environ)
+        env.setdefault("VIZ_TEX_CACHE_DIR", os.path.join(os.path.dirname(scene.path), ".tex_cache"))
+        if prewarm_workers:
+            env.setdefault("VIZ_TEX_PREWARM_WORKERS", str(prewarm_workers))
+        proc = subprocess.run(cmd, cwd=os.path.dirname(scene.path), env=env, capture_output=True, text=True)
+        if proc.returncode:
+            raise RuntimeError(f"Rendering {scene.name} failed:\n{proc.stderr[-2000:]}")
+
+        for dirpath, _, files in os.walk(media_dir):
+            if f"{scene.name}.mov" in files:
+                os.makedirs(scene.out_dir, exist_ok=True)
+                shutil.move(os.path.join(dirpath, f"{scene.name}.mov"), scene.out_file)
+                break
+        else:
+            raise RuntimeError(f"manim did not write {scene.name}.mov")
+
+    return scene
+
+
+def main(argv=None):
+    # Imported here, export itself builds on this module
+    from vizutils import export
+
+    parser = argparse.ArgumentParser(description="Render all scenes, skipping the up to date ones")
+    parser.add_argument("scenes", nargs="*", help="scene names to render (default: all)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="parallel renders")
+    parser.add_argument("-q", "--quality", default="h", choices=list("lmhpk"), help="manim quality flag")
+    parser.add_argument("-f", "--force", action="store_true", help="render even if up to date")
+    parser.add_argument("-n", "--dry-run", action="store_true", help="only list what would render")
+    parser.add_argument("--export", action="append", choices=export.FORMATS, help="also export the movies")
+    export.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    scenes = [
+        scene
+        for file in SCENE_FILES
+        for scene in find_scenes(os.path.join(ROOT, file), quality=args.quality)
+        if not args.scenes or scene.name in args.scenes
+    ]
+    todo = [scene for scene in scenes if args.force or not is_current(scene)]
+    for scene in scenes:
+        print(f"{'render' if scene in todo else 'skip  '} {scene.name}")
+    if args.dry_run:
+        return 0
+
+    failed = 0
+    # Each concurrent render gets its share of the cores for LaTeX pre-warm
+    prewarm_workers = max(1, os.cpu_count() // max(1, min(args.jobs, len(todo))))
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        # Each job runs manim in its own process, the threads only wait on them
+        futures = {pool.submit(render, scene, args.quality, prewarm_workers): scene for scene in todo}
+        for future in as_completed(futures):
+            scene = futures[future]
+            try:
+                future.result()
+            except RuntimeError as e:
+                failed += 1
+                print(e, file=sys.stderr)
+            else:
+                save_hash(scene)
+                print(f"done   {scene.name}")
+
+    if args.export:
+        movies = [scene.out_file for scene in scenes if os.path.exists(scene.out_file)]
+        failed += export.export_all(movies, args.export, args.jobs, **export.export_options(args))
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
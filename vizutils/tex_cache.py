@@ -0,0 +1,176 @@
+import hashlib
+import os
+import pickle
+from collections import OrderedDict
+
+import manim
+from manim import MathTex, Tex, config
+
+
+def _freeze(value):
+    # Hashable stand-in for keyword values, templates are keyed by their body
+    if hasattr(value, "body"):
+        return ("tex_template", value.body)
+    if isinstance(value, (list, tuple)):
+        return tuple(map(_freeze, value))
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value if isinstance(value, (str, int, float, bool, type(None))) else str(value)
+
+
+# The disk tier is rescanned at least every SCAN_EVERY writes, and eviction
+# trims it to LOW_WATER of max_bytes so that the next writes need no scan
+SCAN_EVERY = 64
+LOW_WATER = 0.9
+
+
+class TexCache:
+    # Parsed Tex/MathTex mobjects keyed by class, tex strings and keyword
+    # arguments (font size, color, template, ...). An in memory LRU tier sits
+    # in front of a size bounded on disk tier of pickled mobjects; callers
+    # always get a copy, so the cached mobject is never moved or restyled
+    def __init__(self, max_items=2048, cache_dir=None, max_bytes=256 * 2 ** 20):
+        self.max_items = max_items
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        # Lookups are appended here while a scene records its manifest
+        self.log = None
+        # Estimated size of the disk tier (other processes write to it too,
+        # so it is rescanned every SCAN_EVERY writes) and writes since the scan
+        self._disk_bytes = None
+        self._writes = 0
+
+    def key(self, cls, *tex_strings, **kwargs):
+        return (cls.__name__, tuple(map(str, tex_strings)), _freeze(kwargs))
+
+    def get(self, cls, *tex_strings, **kwargs):
+        key = self.key(cls, *tex_strings, **kwargs)
+        if self.log is not None:
+            self.log.append((cls.__name__, tex_strings, kwargs))
+        mob = self.memory.get(key)
+        if mob is not None:
+            self.memory.move_to_end(key)
+            self.hits += 1
+            return mob.copy()
+
+        mob = self._load(key)
+        if mob is not None:
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            mob = cls(*tex_strings, **kwargs)
+            self._dump(key, mob)
+
+        self.put(key, mob)
+        return mob.copy()
+
+    def put(self, key, mob):
+        self.memory[key] = mob
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_items:
+            self.memory.popitem(last=False)
+
+    def cached(self, key):
+        return key in self.memory or os.path.exists(self._path(key)[1])
+
+    def compile(self, cls, *tex_strings, **kwargs):
+        # Build the mobject straight into the disk tier (pre-warm workers)
+        self._dump(self.key(cls, *tex_strings, **kwargs), cls(*tex_strings, **kwargs))
+
+    def preload(self, key):
+        # Move a disk tier entry into the memory tier without counting a hit
+        if key not in self.memory:
+            mob = self._load(key)
+            if mob is not None:
+                self.put(key, mob)
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.disk_hits + self.misses
+        return (self.hits + self.disk_hits) / total if total else 0.0
+
+    def _path(self, key):
+        cache_dir = self.cache_dir or os.path.join(config.media_dir, "tex_cache")
+        digest = hashlib.sha1(repr((manim.__version__, key)).encode()).hexdigest()
+        return cache_dir, os.path.join(cache_dir, f"{digest}.pkl")
+
+    def _load(self, key):
+        if not self.max_bytes:
+            return None
+        _, path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                mob = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+        # Reads refresh the mtime, which is what eviction goes by; another
+        # process may have evicted the file since it was read
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return mob
+
+    def _dump(self, key, mob):
+        if not self.max_bytes:
+            return
+        cache_dir, path = self._path(key)
+        try:
+            data = pickle.dumps(mob, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return
+
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        self._writes += 1
+        if self._disk_bytes is not None:
+            self._disk_bytes += len(data)
+        if self._disk_bytes is None or self._disk_bytes > self.max_bytes or self._writes >= SCAN_EVERY:
+            self._evict(cache_dir)
+
+    def _evict(self, cache_dir):
+        # Drop the least recently used entries once the disk tier is over
+        # max_bytes; parallel renders and pre-warm workers share the
+        # directory, so entries can vanish while it is being scanned
+        entries = []
+        for entry in os.scandir(cache_dir):
+            if entry.name.endswith(".pkl"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_bytes:
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes * LOW_WATER:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+        self._disk_bytes = total
+        self._writes = 0
+
+
+# The render driver points this at a directory that outlives its temporary
+# media dirs
+tex_cache = TexCache(cache_dir=os.environ.get("VIZ_TEX_CACHE_DIR"))
+
+
+def cached_math_tex(*tex_strings, **kwargs):
+    return tex_cache.get(MathTex, *tex_strings, **kwargs)
+
+
+def cached_tex(*tex_strings, **kwargs):
+    return tex_cache.get(Tex, *tex_strings, **kwargs)
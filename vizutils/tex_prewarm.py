@@ -0,0 +1,179 @@
+import ast
+import inspect
+import os
+import pickle
+import textwrap
+from concurrent.futures import ProcessPoolExecutor
+
+import manim
+from manim import config
+
+from vizutils.tex_cache import tex_cache
+
+# Pre-compilation is on unless VIZ_TEX_PREWARM=0
+PREWARM = os.environ.get("VIZ_TEX_PREWARM", "1") not in ("", "0")
+# Pool size, default one worker per core; vizutils.render splits the cores
+# between its parallel renders
+WORKERS = int(os.environ.get("VIZ_TEX_PREWARM_WORKERS") or 0) or None
+# Calls picked up by the source scan, by the mobject class they build
+TEX_CALLS = {"cached_math_tex": "MathTex", "cached_tex": "Tex", "MathTex": "MathTex", "Tex": "Tex"}
+# Jobs compiled by prewarm in this process so far. The pool workers' LaTeX
+# runs are invisible to compile_tex patches in this process, so bench and
+# the profiler add this count to theirs
+stats = {"compiles": 0}
+
+
+def _evaluable(node):
+    # Literals, names, attributes and arithmetic, nothing that calls code
+    return not any(isinstance(n, (ast.Call, ast.Starred, ast.Lambda)) for n in ast.walk(node))
+
+
+def _eval(node, env):
+    return eval(compile(ast.Expression(node), "<tex>", "eval"), env)
+
+
+def scan_source(cls, env):
+    # (class name, tex strings, kwargs) of the tex calls in the methods of cls
+    # whose arguments follow from env (module globals, self) and the plain
+    # assignments in the method, e.g. eqn_font_size = 32
+    try:
+        tree = ast.parse(textwrap.dedent(inspect.getsource(cls)))
+    except (OSError, TypeError, SyntaxError):
+        return []
+
+    jobs = []
+    for func in ast.walk(tree):
+        if not isinstance(func, ast.FunctionDef):
+            continue
+        local = dict(env)
+        for stmt in func.body:
+            if (
+                isinstance(stmt, ast.Assign)
+                and len(stmt.targets) == 1
+                and isinstance(stmt.targets[0], ast.Name)
+                and _evaluable(stmt.value)
+            ):
+                try:
+                    local[stmt.targets[0].id] = _eval(stmt.value, local)
+                except Exception:
+                    pass
+
+        for node in ast.walk(func):
+            if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in TEX_CALLS):
+                continue
+            values = node.args + [kw.value for kw in node.keywords]
+            if any(kw.arg is None for kw in node.keywords) or not all(map(_evaluable, values)):
+                continue
+            try:
+                args = tuple(_eval(arg, local) for arg in node.args)
+                kwargs = {kw.arg: _eval(kw.value, local) for kw in node.keywords}
+            except Exception:
+                continue
+            jobs.append((TEX_CALLS[node.func.id], args, kwargs))
+    return jobs
+
+
+def manifest_path(scene_name):
+    cache_dir = tex_cache.cache_dir or os.path.join(config.media_dir, "tex_cache")
+    return os.path.join(cache_dir, "manifests", f"{scene_name}.pkl")
+
+
+def load_manifest(scene_name):
+    try:
+        with open(manifest_path(scene_name), "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return []
+
+
+def save_manifest(scene_name, jobs):
+    unique = {}
+    for cls_name, tex_strings, kwargs in jobs:
+        key = tex_cache.key(getattr(manim, cls_name), *tex_strings, **kwargs)
+        unique.setdefault(key, (cls_name, tex_strings, kwargs))
+    jobs = list(unique.values())
+
+    path = manifest_path(scene_name)
+    try:
+        data = pickle.dumps(jobs, protocol=pickle.HIGHEST_PROTOCOL)
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _init_worker(media_dir, cache_dir):
+    config.media_dir = media_dir
+    tex_cache.cache_dir = cache_dir
+
+
+def _compile(job):
+    cls_name, tex_strings, kwargs = job
+    tex_cache.compile(getattr(manim, cls_name), *tex_strings, **kwargs)
+
+
+def prewarm(jobs, workers=None):
+    # Compile the jobs that neither cache tier has in a process pool; the
+    # workers write the disk tier, which is then read into the memory tier.
+    # Returns the number of compiled jobs
+    if not tex_cache.max_bytes:
+        return 0
+
+    keys, todo = {}, {}
+    for cls_name, tex_strings, kwargs in jobs:
+        key = tex_cache.key(getattr(manim, cls_name), *tex_strings, **kwargs)
+        if key in keys:
+            continue
+        keys[key] = None
+        if not tex_cache.cached(key):
+            todo[key] = (cls_name, tex_strings, kwargs)
+
+    workers = min(workers or WORKERS or os.cpu_count(), len(todo))
+    if workers > 1:
+        initargs = (config.media_dir, tex_cache.cache_dir)
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=initargs) as pool:
+            list(pool.map(_compile, todo.values()))
+    else:
+        for job in todo.values():
+            _compile(job)
+
+    for key in keys:
+        tex_cache.preload(key)
+    stats["compiles"] += len(todo)
+    return len(todo)
+
+
+class PrewarmedScene:
+    # Scene mixin, e.g. class MyScene(PrewarmedScene, ProfiledScene, Scene).
+    # Before construct the tex the scene will need is compiled in parallel:
+    # tex_strings declared on the class (MathTex strings or (class name, tex
+    # strings, kwargs) tuples), calls found in the source of its methods and
+    # whatever the previous render of the scene looked up (its manifest)
+    prewarm = PREWARM
+    tex_strings = ()
+
+    def tex_jobs(self):
+        jobs = [
+            ("MathTex", (tex,), {}) if isinstance(tex, str) else tex
+            for tex in self.tex_strings
+        ]
+        env = dict(type(self).construct.__globals__, self=self)
+        for cls in type(self).__mro__:
+            if cls.__module__ == type(self).__module__:
+                jobs += scan_source(cls, env)
+        return jobs + load_manifest(type(self).__name__)
+
+    def setup(self):
+        super().setup()
+        if self.prewarm:
+            prewarm(self.tex_jobs())
+        tex_cache.log = []
+
+    def tear_down(self):
+        log, tex_cache.log = tex_cache.log, None
+        if log:
+            save_manifest(type(self).__name__, log)
+        super().tear_down()